@@ -0,0 +1,204 @@
+"""
+Measure the fm data path against a mocked Last.fm server.
+
+    python -m benchmarks.fm --users 200 --rounds 10 --latency 0.08
+
+"before" is the pipeline fm used prior to the speculative track.getinfo,
+"after" is Lastfm.now_playing. Between rounds the recent tracks cache is
+dropped, as it would have expired between two real fm calls; --cold drops
+every cached response instead.
+"""
+
+from argparse import ArgumentParser
+from asyncio import gather, run, sleep
+from collections import Counter, OrderedDict
+from random import Random
+from statistics import median, quantiles
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from aiohttp import web
+from cashews import cache
+
+from features.lastfm.client import Client
+from features.lastfm.lastfm import Lastfm
+
+
+class Server:
+    def __init__(self: "Server", latency: float, change: float, seed: int = 0):
+        self.latency = latency
+        self.change = change
+        self.random = Random(seed)
+        self.tracks: Dict[str, int] = {}
+        self.requests: Counter = Counter()
+
+    def advance(self: "Server") -> None:
+        for username in self.tracks:
+            if self.random.random() < self.change:
+                self.tracks[username] += 1
+
+    def track(self: "Server", username: str) -> Tuple[str, str]:
+        index = self.tracks.setdefault(username, 0)
+        return f"Artist {sum(map(ord, username)) % 500}", f"Track {index}"
+
+    async def handle(self: "Server", request: web.Request) -> web.Response:
+        await sleep(self.latency)
+
+        method = request.query["method"]
+        username = request.query.get("username", "")
+        self.requests[method] += 1
+
+        if method == "user.getrecenttracks":
+            artist, name = self.track(username)
+            payload: Dict[str, Any] = {
+                "recenttracks": {
+                    "track": [
+                        {
+                            "name": name,
+                            "url": f"https://www.last.fm/music/{artist}/_/{name}",
+                            "artist": {"#text": artist},
+                            "album": {"#text": "Album"},
+                            "image": [{"#text": ""}] * 4,
+                            "@attr": {"nowplaying": "true"},
+                        }
+                    ]
+                }
+            }
+        elif method == "user.getinfo":
+            payload = {
+                "user": {
+                    "name": username,
+                    "url": f"https://www.last.fm/user/{username}",
+                    "playcount": "12345",
+                    "image": [{"#text": ""}] * 4,
+                }
+            }
+        elif method == "track.getinfo":
+            payload = {
+                "track": {
+                    "name": request.query["track"],
+                    "artist": {"name": request.query["artist"]},
+                    "userplaycount": "42",
+                }
+            }
+        else:
+            payload = {"error": 3, "message": "Invalid Method"}
+
+        return web.json_response(payload)
+
+
+async def before(client: Client, username: str) -> Any:
+    tracks, user = await gather(
+        client.request(
+            method="user.getrecenttracks",
+            username=username,
+            slug="recenttracks.track",
+            limit=1,
+        ),
+        client.request(
+            method="user.getinfo",
+            username=username,
+            slug="user",
+        ),
+    )
+    track = tracks[0]
+
+    return (
+        track,
+        await client.request(
+            method="track.getinfo",
+            username=username,
+            track=track.name,
+            artist=track.artist["#text"],
+            slug="track",
+        ),
+        user,
+    )
+
+
+async def measure(
+    server: Server,
+    usernames: List[str],
+    rounds: int,
+    cold: bool,
+    call: Callable[[str], Awaitable[Any]],
+) -> Tuple[List[float], int]:
+    async def timed(username: str) -> float:
+        started = perf_counter()
+        await call(username)
+        return (perf_counter() - started) * 1000
+
+    await cache.clear()
+    server.tracks.clear()
+    server.random.seed(0)
+    server.requests.clear()
+
+    timings: List[float] = []
+    for _ in range(rounds):
+        timings.extend(await gather(*[timed(username) for username in usernames]))
+
+        server.advance()
+        if cold:
+            await cache.clear()
+        else:
+            await cache.delete_match("lastfm:recenttracks.track:*")
+
+    return timings, sum(server.requests.values())
+
+
+async def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--change", type=float, default=0.3)
+    parser.add_argument("--cold", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    arguments = parser.parse_args()
+
+    server = Server(arguments.latency, arguments.change)
+    application = web.Application()
+    application.router.add_get("/2.0/", server.handle)
+
+    runner = web.AppRunner(application)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", arguments.port).start()
+
+    client = Client(base_url=f"http://127.0.0.1:{arguments.port}")
+    for bucket in client.buckets:
+        bucket.rate = bucket.capacity = 10**6
+        bucket.tokens = bucket.capacity
+
+    cog = SimpleNamespace(client=client, playing=OrderedDict())
+    usernames = [f"user{index}" for index in range(arguments.users)]
+    calls = arguments.users * arguments.rounds
+
+    try:
+        print(
+            f"{'pipeline':<10}{'p50 ms':>10}{'p95 ms':>10}{'upstream/call':>16}"
+            f"  ({calls} calls, {arguments.latency * 1000:.0f} ms latency)"
+        )
+        for name, call in (
+            ("before", lambda username: before(client, username)),
+            ("after", lambda username: Lastfm.now_playing(cog, username)),
+        ):
+            timings, requests = await measure(
+                server,
+                usernames,
+                arguments.rounds,
+                arguments.cold,
+                call,
+            )
+            print(
+                f"{name:<10}{median(timings):>10.1f}"
+                f"{quantiles(timings, n=20)[-1]:>10.1f}"
+                f"{requests / calls:>16.2f}"
+            )
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    run(main())
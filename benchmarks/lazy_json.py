@@ -0,0 +1,114 @@
+"""
+Compare DefaultMunch.fromDict against the lazy JSON views on gettop* payloads.
+
+    python -m benchmarks.lazy_json
+    python -m benchmarks.lazy_json --record <lastfm username>
+
+Recorded payloads are stored in benchmarks/fixtures and preferred over the
+synthetic ones, which only mirror the shape of a 1000 item Last.fm page.
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+from gc import collect
+from time import process_time
+from tracemalloc import get_traced_memory, start, stop
+from typing import Any, Callable, Dict, List, Tuple
+
+from munch import DefaultMunch
+
+from config import Authorization
+from tools.managers.lazy import resolve
+from tools.managers.network import loads
+
+from .payloads import load, record, slugs, source
+
+
+def munch(body: bytes, slug: str) -> Any:
+    data = DefaultMunch.fromDict(loads(body))
+    for path in slug.split("."):
+        data = getattr(data, path, data)
+
+    return data
+
+
+def lazy(body: bytes, slug: str) -> Any:
+    return resolve(loads(body), slug)
+
+
+def everything(items: Any) -> List[Tuple[str, str]]:
+    return [(item.name, item.playcount) for item in items]
+
+
+def page(items: Any) -> List[Tuple[str, str]]:
+    return [(item.name, item.url) for item in items[:10]]
+
+
+def measure(
+    parse: Callable[[bytes, str], Any],
+    consume: Callable[[Any], Any],
+    body: bytes,
+    slug: str,
+    number: int,
+) -> Tuple[float, int]:
+    consume(parse(body, slug))
+    collect()
+
+    started = process_time()
+    for _ in range(number):
+        consume(parse(body, slug))
+
+    elapsed = (process_time() - started) / number * 1000
+
+    collect()
+    start()
+    result = consume(parse(body, slug))
+    _, peak = get_traced_memory()
+    stop()
+    del result
+
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--record", metavar="USERNAME")
+    parser.add_argument("--number", type=int, default=50)
+    arguments = parser.parse_args()
+
+    if arguments.record:
+        for file in run(record(arguments.record, Authorization.Lastfm[0])):
+            print(f"recorded {file}")
+
+    rows: List[Dict[str, Any]] = []
+    for method, slug in slugs.items():
+        if method == "user.getrecenttracks":
+            continue
+
+        body = load(method)
+        for access, consume in (("all", everything), ("page", page)):
+            for name, parse in (("munch", munch), ("lazy", lazy)):
+                elapsed, peak = measure(parse, consume, body, slug, arguments.number)
+                rows.append(
+                    {
+                        "method": method,
+                        "access": access,
+                        "parser": name,
+                        "ms": elapsed,
+                        "kib": peak / 1024,
+                        "source": "recorded" if source(method) else "synthetic",
+                    }
+                )
+
+    print(
+        f"{'method':<22}{'access':<8}{'parser':<8}{'cpu ms':>10}{'peak KiB':>12}  source"
+    )
+    for row in rows:
+        print(
+            f"{row['method']:<22}{row['access']:<8}{row['parser']:<8}"
+            f"{row['ms']:>10.2f}{row['kib']:>12.0f}  {row['source']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
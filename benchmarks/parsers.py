@@ -0,0 +1,175 @@
+"""
+Time the JSON decoders and HTML tree builders ClientSession can pick from.
+
+    python -m benchmarks.parsers
+    python -m benchmarks.parsers --record https://coomer.party/onlyfans/user/<name>
+
+JSON is measured on the gettop* payloads from benchmarks.payloads and any
+other benchmarks/fixtures/*.json, HTML on benchmarks/fixtures/*.html. When
+no page was recorded, a synthetic coomer.party listing is used instead.
+Backends that are not installed are skipped.
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+from glob import glob
+from os import makedirs, path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from tools.services.onlyfans import extract, paginate, total
+
+from .payloads import fixtures, load, slugs
+
+
+def decoders() -> Dict[str, Callable[[bytes], Any]]:
+    from json import loads
+
+    backends: Dict[str, Callable[[bytes], Any]] = {"json": loads}
+    try:
+        from orjson import loads as orjson
+
+        backends["orjson"] = orjson
+    except ImportError:
+        pass
+
+    try:
+        from msgspec.json import decode
+
+        backends["msgspec"] = decode
+    except ImportError:
+        pass
+
+    return backends
+
+
+def builders() -> List[str]:
+    backends = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+
+        backends.append("lxml")
+    except ImportError:
+        pass
+
+    return backends
+
+
+def listing(posts: int = 50) -> bytes:
+    cards = "".join(
+        f"""
+        <article class="post-card post-card--preview" data-id="{1000000 + index}">
+            <a href="/onlyfans/user/benchmark/post/{1000000 + index}">
+                <header class="post-card__header">Caption for post {index}</header>
+                <div class="post-card__image-container">
+                    <img class="post-card__image" src="//img.coomer.party/thumbnail/data/{index:04x}.jpg">
+                </div>
+                <footer class="post-card__footer"><div>{index % 5} attachments</div></footer>
+            </a>
+        </article>
+        """
+        for index in range(posts)
+    )
+    pages = "".join(
+        f'<a href="/onlyfans/user/benchmark?o={offset}">{offset // 50 + 1}</a>'
+        for offset in range(0, 500, 50)
+    )
+
+    return f"""
+    <!DOCTYPE html>
+    <html>
+        <head><title>benchmark | coomer.party</title></head>
+        <body>
+            <div class="user-header">
+                <span itemprop="name">benchmark</span>
+            </div>
+            <div class="paginator">
+                <small>Showing 1 - {posts} of 500</small>
+                <menu>{pages}<a class="next" href="/onlyfans/user/benchmark?o=50">&gt;</a></menu>
+            </div>
+            <div class="card-list__items">{cards}</div>
+        </body>
+    </html>
+    """.encode()
+
+
+def measure(func: Callable[[], Any], number: int, repeat: int = 5) -> float:
+    func()
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = perf_counter()
+        for _ in range(number):
+            func()
+
+        timings.append((perf_counter() - started) / number * 1000)
+
+    return min(timings)
+
+
+async def record(url: str) -> str:
+    from aiohttp import ClientSession
+
+    makedirs(fixtures, exist_ok=True)
+    async with ClientSession() as session:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            body = await response.read()
+
+    name = "_".join(part for part in url.split("/")[2:] if part) or "page"
+    with open(file := path.join(fixtures, f"{name}.html"), "wb") as buffer:
+        buffer.write(body)
+
+    return file
+
+
+def documents() -> Tuple[Dict[str, bytes], Dict[str, bytes]]:
+    json = {method: load(method) for method in slugs}
+    for file in sorted(glob(path.join(fixtures, "*.json"))):
+        name = path.basename(file)[:-5]
+        if name not in json:
+            with open(file, "rb") as buffer:
+                json[name] = buffer.read()
+
+    html: Dict[str, bytes] = {}
+    for file in sorted(glob(path.join(fixtures, "*.html"))):
+        with open(file, "rb") as buffer:
+            html[path.basename(file)[:-5]] = buffer.read()
+
+    return json, html or {"synthetic listing": listing()}
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--record", metavar="URL")
+    parser.add_argument("--number", type=int, default=20)
+    arguments = parser.parse_args()
+
+    if arguments.record:
+        print(f"recorded {run(record(arguments.record))}")
+
+    json, html = documents()
+
+    print(f"{'fixture':<32}{'backend':<14}{'ms':>10}")
+    for name, body in json.items():
+        for backend, loads in decoders().items():
+            elapsed = measure(lambda: loads(body), arguments.number)
+            print(f"{name:<32}{backend:<14}{elapsed:>10.2f}")
+
+    for name, body in html.items():
+        text = body.decode("utf-8", "replace")
+        for backend in builders():
+
+            def parse() -> None:
+                soup = BeautifulSoup(text, backend)
+                extract(soup)
+                total(soup)
+                paginate(soup)
+
+            elapsed = measure(parse, arguments.number)
+            print(f"{name[:31]:<32}{backend:<14}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
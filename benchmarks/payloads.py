@@ -0,0 +1,125 @@
+from json import dumps
+from os import makedirs, path
+from random import Random
+from typing import Dict, List, Optional
+
+fixtures = path.join(path.dirname(__file__), "fixtures")
+slugs: Dict[str, str] = {
+    "user.gettopartists": "topartists.artist",
+    "user.gettopalbums": "topalbums.album",
+    "user.gettoptracks": "toptracks.track",
+    "user.getrecenttracks": "recenttracks.track",
+}
+
+
+def fixture(name: str) -> str:
+    return path.join(fixtures, f"{name}.json")
+
+
+def image(random: Random) -> List[Dict[str, str]]:
+    digest = "%032x" % random.getrandbits(128)
+    return [
+        {
+            "size": size,
+            "#text": f"https://lastfm.freetls.fastly.net/i/u/{width}/{digest}.png",
+        }
+        for size, width in (
+            ("small", "34s"),
+            ("medium", "64s"),
+            ("large", "174s"),
+            ("extralarge", "300x300"),
+        )
+    ]
+
+
+def item(method: str, index: int, random: Random) -> Dict:
+    artist = f"Artist {random.randrange(5000)}"
+    entry = {
+        "name": f"{slugs[method].split('.')[-1].title()} {index}",
+        "mbid": "",
+        "url": f"https://www.last.fm/music/{artist.replace(' ', '+')}",
+        "playcount": str(max(1, 5000 - index * 4 - random.randrange(4))),
+        "image": image(random),
+        "@attr": {"rank": str(index + 1)},
+    }
+
+    if method == "user.gettopartists":
+        entry["name"] = artist
+        entry["streamable"] = "0"
+    else:
+        entry["artist"] = {"name": artist, "mbid": "", "url": entry["url"]}
+
+    if method == "user.gettoptracks":
+        entry["duration"] = str(random.randrange(90, 420))
+        entry["streamable"] = {"fulltrack": "0", "#text": "0"}
+
+    if method == "user.getrecenttracks":
+        entry.pop("playcount")
+        entry.pop("@attr")
+        entry["artist"] = {"#text": artist, "mbid": ""}
+        entry["album"] = {"#text": f"Album {random.randrange(2000)}", "mbid": ""}
+        entry["date"] = {"uts": str(1700000000 - index * 200), "#text": ""}
+
+    return entry
+
+
+def synthesize(method: str, limit: int = 1000, seed: int = 0) -> bytes:
+    random = Random(seed)
+    root, key = slugs[method].split(".")
+
+    return dumps(
+        {
+            root: {
+                key: [item(method, index, random) for index in range(limit)],
+                "@attr": {
+                    "user": "benchmark",
+                    "page": "1",
+                    "perPage": str(limit),
+                    "totalPages": "1",
+                    "total": str(limit),
+                },
+            }
+        }
+    ).encode()
+
+
+def load(method: str, limit: int = 1000) -> bytes:
+    if path.exists(file := fixture(method)):
+        with open(file, "rb") as buffer:
+            return buffer.read()
+
+    return synthesize(method, limit)
+
+
+async def record(username: str, key: str, limit: int = 1000) -> List[str]:
+    from aiohttp import ClientSession
+
+    makedirs(fixtures, exist_ok=True)
+    written: List[str] = []
+
+    async with ClientSession() as session:
+        for method in slugs:
+            async with session.get(
+                "http://ws.audioscrobbler.com/2.0/",
+                params={
+                    "method": method,
+                    "user": username,
+                    "limit": limit,
+                    "period": "overall",
+                    "api_key": key,
+                    "format": "json",
+                },
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+
+            with open(file := fixture(method), "wb") as buffer:
+                buffer.write(body)
+
+            written.append(file)
+
+    return written
+
+
+def source(method: str) -> Optional[str]:
+    return fixture(method) if path.exists(fixture(method)) else None
@@ -0,0 +1,214 @@
+"""
+Seed a synthetic Last.fm library and print the plans of the indexed lookups.
+
+    python -m benchmarks.whoknows --dsn postgres://localhost/kayo_bench
+
+Point --dsn at a scratch database: the migrations are applied to it and
+--reseed truncates the seeded tables. Every plan is run with
+EXPLAIN (ANALYZE, BUFFERS) after a VACUUM ANALYZE, and the summary reports
+whether it was served by an index-only scan.
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+from time import perf_counter
+from typing import Any, List, Tuple
+
+from tools.managers import database
+
+pool = 100003
+tables = ("lastfm.artists", "lastfm.albums", "lastfm.tracks", "lastfm.listeners")
+seeds: List[Tuple[str, str]] = [
+    (
+        "lastfm.artists",
+        """
+        INSERT INTO lastfm.artists (user_id, username, artist, plays)
+        SELECT
+            1 + series / $2,
+            'user' || (1 + series / $2),
+            'Artist ' || ((series % $2 + (series / $2) * 7919) % $3),
+            1 + (series * 2654435761) % 5000
+        FROM generate_series(0, $1 - 1) AS series
+        """,
+    ),
+    (
+        "lastfm.albums",
+        """
+        INSERT INTO lastfm.albums (user_id, username, artist, album, plays)
+        SELECT
+            1 + series / $2,
+            'user' || (1 + series / $2),
+            'Artist ' || ((series % $2 / 10 + (series / $2) * 7919) % $3),
+            'Album ' || (series % 10),
+            1 + (series * 2654435761) % 2000
+        FROM generate_series(0, $1 - 1) AS series
+        """,
+    ),
+    (
+        "lastfm.tracks",
+        """
+        INSERT INTO lastfm.tracks (user_id, username, artist, track, plays)
+        SELECT
+            1 + series / $2,
+            'user' || (1 + series / $2),
+            'Artist ' || ((series % $2 / 10 + (series / $2) * 7919) % $3),
+            'Track ' || (series % 10),
+            1 + (series * 2654435761) % 1000
+        FROM generate_series(0, $1 - 1) AS series
+        """,
+    ),
+]
+
+
+async def seed(
+    connection: database.Connection,
+    rows: int,
+    library: int,
+    guilds: int,
+    guild_size: int,
+) -> None:
+    users = rows // library
+
+    for table, query in seeds:
+        started = perf_counter()
+        await connection.execute(query, rows, library, pool)
+        print(f"seeded {rows:,} rows into {table} in {perf_counter() - started:.0f}s")
+
+    await connection.execute(
+        """
+        INSERT INTO lastfm.listeners (guild_id, user_id)
+        SELECT
+            guild,
+            1 + (guild * 104729 + member * 31) % $3
+        FROM generate_series(1, $1) AS guild,
+        generate_series(0, $2 - 1) AS member
+        ON CONFLICT DO NOTHING
+        """,
+        guilds,
+        guild_size,
+        users,
+    )
+    await connection.execute(
+        """
+        INSERT INTO metrics.names (user_id, name, pomelo, updated_at)
+        SELECT
+            1 + series / 25,
+            'name' || series,
+            series % 3 <> 0,
+            NOW() - (series % 25) * INTERVAL '1 day'
+        FROM generate_series(0, $1 * 25 - 1) AS series
+        """,
+        users,
+    )
+
+
+async def explain(connection: database.Connection, query: str, *args: Any) -> str:
+    records = await connection.fetch(
+        f"EXPLAIN (ANALYZE, BUFFERS) {query}",
+        *args,
+    )
+
+    return "\n".join(record[0] for record in records)
+
+
+async def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--library", type=int, default=500)
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--guild-size", type=int, default=5000)
+    parser.add_argument("--reseed", action="store_true")
+    arguments = parser.parse_args()
+
+    db = await database.connect(dsn=arguments.dsn, min_size=1, max_size=2)
+    async with db.acquire() as connection:
+        if arguments.reseed:
+            await connection.execute(
+                f"TRUNCATE {', '.join(tables)}, metrics.names",
+            )
+
+        if not await connection.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM lastfm.artists)"
+        ):
+            async with connection.transaction():
+                await seed(
+                    connection,
+                    arguments.rows,
+                    arguments.library,
+                    arguments.guilds,
+                    arguments.guild_size,
+                )
+
+        for table in (*tables, "metrics.names"):
+            await connection.execute(f"VACUUM ANALYZE {table}")
+
+        artist, album, track = await connection.fetchrow(
+            """
+            SELECT albums.artist::TEXT, albums.album::TEXT, tracks.track::TEXT
+            FROM lastfm.albums
+            JOIN lastfm.tracks
+            ON tracks.user_id = albums.user_id
+            AND tracks.artist = albums.artist
+            WHERE albums.user_id = 1
+            LIMIT 1
+            """
+        )
+
+        plans = [
+            (
+                "whoknows",
+                await explain(
+                    connection,
+                    database.queries["lastfm.whoknows.artist"],
+                    artist,
+                    1,
+                ),
+            ),
+            (
+                "wkalbum",
+                await explain(
+                    connection,
+                    database.queries["lastfm.whoknows.album"],
+                    album,
+                    artist,
+                    1,
+                ),
+            ),
+            (
+                "wktrack",
+                await explain(
+                    connection,
+                    database.queries["lastfm.whoknows.track"],
+                    track,
+                    artist,
+                    1,
+                ),
+            ),
+            (
+                "namehistory",
+                await explain(
+                    connection,
+                    """
+                    SELECT name, pomelo, updated_at
+                    FROM metrics.names
+                    WHERE user_id = $1
+                    ORDER BY updated_at DESC
+                    """,
+                    1,
+                ),
+            ),
+        ]
+
+    await db.close()
+
+    for name, plan in plans:
+        print(f"\n-- {name}\n{plan}")
+
+    print()
+    for name, plan in plans:
+        print(f"{name:<12} index-only scan: {'Index Only Scan' in plan}")
+
+
+if __name__ == "__main__":
+    run(main())
@@ -15,6 +15,17 @@ class Database:
     username = "postgres.nvvhswaxifmumxrybqqk"
     database = "postgres"
     password = "scare.life!@#"
+    min_size = 4
+    max_size = 16
+    max_queries = 50000
+    max_inactive_connection_lifetime = 300.0
+    statement_cache_size = 256
+    pgbouncer = True
+    slow_query = 0.25
+    # LISTEN/NOTIFY needs a session-mode pooler or a direct connection, a
+    # transaction-mode pgbouncer drops the subscription between statements.
+    # When unset the blacklist listener uses the regular login data.
+    listener_dsn = None
 
 
 class Redis:
@@ -1,30 +1,194 @@
-from random import choice
-from typing import Any, Optional
+from asyncio import Future, Lock, TimeoutError, create_task, shield, sleep
+from collections import Counter
+from random import uniform
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
 
-from munch import Munch
+from aiohttp import ClientConnectionError, ClientResponseError
+from cashews import cache
 
 from config import Authorization
+from tools.managers import LazyDict, logging
 from tools.managers.network import ClientSession
 
+log = logging.getLogger(__name__)
+cache.setup("mem://", prefix="lastfm")
+
+ttls: Dict[str, int] = {
+    "user.getinfo": 60,
+    "user.getrecenttracks": 10,
+    "track.getinfo": 600,
+    "album.getinfo": 600,
+    "artist.getinfo": 600,
+    "album.search": 3600,
+    "track.search": 3600,
+}
+periods: Dict[str, int] = {
+    "7day": 600,
+    "1month": 1800,
+    "3month": 3600,
+    "6month": 3600,
+    "12month": 3600,
+    "overall": 3600,
+}
+
+
+class Bucket:
+    def __init__(self: "Bucket", key: str, rate: float = 5, capacity: int = 10):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens: float = capacity
+        self.updated = monotonic()
+        self.blocked = 0.0
+        self.lock = Lock()
+
+    def refill(self: "Bucket") -> float:
+        now = monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate,
+        )
+        self.updated = now
+
+        return self.tokens
+
+    @property
+    def available(self: "Bucket") -> float:
+        if self.blocked > monotonic():
+            return -1
+
+        return self.refill()
+
+    def block(self: "Bucket", delay: float) -> None:
+        self.blocked = max(self.blocked, monotonic() + delay)
+
+    async def acquire(self: "Bucket") -> None:
+        async with self.lock:
+            while True:
+                if (delay := self.blocked - monotonic()) > 0:
+                    await sleep(delay)
+                    continue
+
+                if self.refill() >= 1:
+                    self.tokens -= 1
+                    return
+
+                await sleep((1 - self.tokens) / self.rate)
+
 
 class Client(ClientSession):
-    def __init__(self: "Client", *args, **kwargs):
+    def __init__(
+        self: "Client",
+        *args,
+        retries: int = 4,
+        base_url: str = "http://ws.audioscrobbler.com",
+        **kwargs,
+    ):
         super().__init__(
-            base_url="http://ws.audioscrobbler.com",
+            base_url=base_url,
             *args,
             **kwargs,
         )
+        self.retries = retries
+        self.buckets: List[Bucket] = [Bucket(key) for key in Authorization.Lastfm]
+        self.pending: Dict[Tuple, Future] = {}
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    def bucket(self: "Client") -> Bucket:
+        return max(self.buckets, key=lambda bucket: bucket.available)
+
+    def ttl(self: "Client", method: str, params: Dict[str, Any]) -> int:
+        if method.startswith("user.gettop"):
+            return periods.get(params.get("period", "overall"), 0)
+
+        elif method.endswith(".getinfo") and params.get("username"):
+            # The user playcount moves with every scrobble.
+            return min(ttls.get(method, 0), ttls["user.getrecenttracks"])
+
+        return ttls.get(method, 0)
+
+    def report(self: "Client") -> Dict[str, Any]:
+        return {
+            method: {
+                "hits": self.hits[method],
+                "misses": self.misses[method],
+            }
+            for method in sorted(self.hits | self.misses)
+        }
 
     async def request(
-        self: "Client", slug: Optional[str] = None, **params: Any
-    ) -> Munch:
-        data: Munch = await super().request(
-            "/2.0/",
-            params={
-                "api_key": choice(Authorization.Lastfm),
-                "format": "json",
-                **params,
-            },
-            slug=slug,
-        )
+        self: "Client",
+        slug: Optional[str] = None,
+        cached: bool = True,
+        **params: Any,
+    ) -> LazyDict:
+        key = (slug, *sorted((name, str(value)) for name, value in params.items()))
+        method = params.get("method", "")
+
+        ttl = self.ttl(method, params) if cached else 0
+        if ttl:
+            identifier = "lastfm:" + ":".join(map(str, key))
+            if (data := await cache.get(identifier)) is not None:
+                self.hits[method] += 1
+                return data
+
+            self.misses[method] += 1
+
+        if not (future := self.pending.get(key)):
+            future = self.pending[key] = create_task(self.fetch(slug, **params))
+            future.add_done_callback(lambda _: self.pending.pop(key, None))
+
+        data = await shield(future)
+        if ttl:
+            await cache.set(identifier, data, expire=ttl)
+
         return data
+
+    async def fetch(
+        self: "Client", slug: Optional[str] = None, **params: Any
+    ) -> LazyDict:
+        attempt = 0
+        while True:
+            bucket = self.bucket()
+            await bucket.acquire()
+
+            try:
+                data: LazyDict = await super().request(
+                    "/2.0/",
+                    params={
+                        "api_key": bucket.key,
+                        "format": "json",
+                        **params,
+                    },
+                    slug=slug,
+                )
+            except ClientResponseError as exception:
+                if attempt == self.retries or (
+                    exception.status != 429 and exception.status < 500
+                ):
+                    raise
+
+                delay = uniform(0, 2**attempt)
+                if exception.status == 429:
+                    bucket.block(delay + 1)
+                    log.warning(
+                        f"Last.fm key {bucket.key[:8]} was rate limited on {params.get('method')}."
+                    )
+
+                await sleep(delay)
+                attempt += 1
+                continue
+            except (ClientConnectionError, TimeoutError):
+                if attempt == self.retries:
+                    raise
+
+                log.warning(
+                    f"Last.fm request for {params.get('method')} failed to connect, retrying."
+                )
+                await sleep(uniform(0, 2**attempt))
+                attempt += 1
+                continue
+
+            return data
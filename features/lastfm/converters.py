@@ -1,10 +1,9 @@
 from typing import TYPE_CHECKING, List
 
 from discord.ext.commands import Converter
-from munch import Munch
 from typing_extensions import Type
 
-from tools.managers import Context
+from tools.managers import Context, LazyDict
 from tools.utilities import Error
 
 if TYPE_CHECKING:
@@ -114,7 +113,7 @@ class Artist(Converter[str]):
         if not lastfm:
             return
 
-        tracks: List[Munch] = await lastfm.client.request(
+        tracks: List[LazyDict] = await lastfm.client.request(
             method="user.getrecenttracks",
             username=ctx.lastfm.username,
             slug="recenttracks.track",
@@ -132,7 +131,7 @@ class Artist(Converter[str]):
         if not lastfm:
             return
 
-        artist: Munch = await lastfm.client.request(
+        artist: LazyDict = await lastfm.client.request(
             method="artist.getinfo",
             artist=argument,
             slug="artist",
@@ -154,7 +153,7 @@ class Album:
         if not lastfm:
             return
 
-        tracks: List[Munch] = await lastfm.client.request(
+        tracks: List[LazyDict] = await lastfm.client.request(
             method="user.getrecenttracks",
             username=ctx.lastfm.username,
             slug="recenttracks.track",
@@ -178,7 +177,7 @@ class Album:
         if not lastfm:
             return
 
-        albums: List[Munch] = await lastfm.client.request(
+        albums: List[LazyDict] = await lastfm.client.request(
             slug="results.albummatches.album",
             method="album.search",
             album=argument,
@@ -204,7 +203,7 @@ class Track:
         if not lastfm:
             return
 
-        tracks: List[Munch] = await lastfm.client.request(
+        tracks: List[LazyDict] = await lastfm.client.request(
             method="user.getrecenttracks",
             username=ctx.lastfm.username,
             slug="recenttracks.track",
@@ -225,7 +224,7 @@ class Track:
         if not lastfm:
             return
 
-        tracks: List[Munch] = await lastfm.client.request(
+        tracks: List[LazyDict] = await lastfm.client.request(
             slug="results.trackmatches.track",
             method="track.search",
             track=argument,
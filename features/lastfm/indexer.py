@@ -0,0 +1,341 @@
+from asyncio import CancelledError, Event, Semaphore, Task, create_task, gather, sleep
+from math import ceil
+from os import getpid
+from socket import gethostname
+from time import perf_counter, time
+from typing import TYPE_CHECKING, Dict, Optional, Set, Tuple
+from uuid import uuid4
+
+
+from tools.managers import LazyDict, database, logging
+
+if TYPE_CHECKING:
+    from .lastfm import Lastfm
+
+log = logging.getLogger(__name__)
+libraries = ("artists", "albums", "tracks")
+
+
+class LeaseLost(Exception):
+    pass
+
+
+class Job:
+    def __init__(self: "Job", record: database.Record):
+        self.user_id: int = record.user_id
+        self.username: str = record.username
+        self.library: Optional[str] = record.library
+        self.page: int = record.page
+        self.pages: int = record.pages
+        self.items: int = record.items
+        self.synced_at: Optional[int] = record.synced_at
+        self.scrobbles: Optional[int] = record.scrobbles
+        self.finished = Event()
+        self.error: Optional[BaseException] = None
+
+    @property
+    def progress(self: "Job") -> str:
+        if not self.library:
+            return "Waiting for an indexing slot..."
+
+        return (
+            f"Stored `{self.items:,}` items, "
+            f"indexing {self.library} (`{self.page}`/`{self.pages}` pages)..."
+        )
+
+    def __repr__(self: "Job") -> str:
+        return f"<Job user_id={self.user_id} library={self.library} page={self.page}>"
+
+
+class Indexer:
+    def __init__(
+        self: "Indexer",
+        cog: "Lastfm",
+        concurrency: int = 2,
+        lease: int = 120,
+    ):
+        self.cog = cog
+        self.bot = cog.bot
+        self.semaphore = Semaphore(concurrency)
+        self.lease = lease
+        self.owner = f"{gethostname()}:{getpid()}:{uuid4().hex[:8]}"
+        self.jobs: Dict[int, Job] = {}
+        self.tasks: Dict[int, Task] = {}
+        self.heartbeat: Optional[Task] = None
+
+    def __contains__(self: "Indexer", user_id: int) -> bool:
+        return user_id in self.jobs
+
+    def get(self: "Indexer", user_id: int) -> Optional[Job]:
+        return self.jobs.get(user_id)
+
+    async def start(self: "Indexer") -> None:
+        await self.claim()
+        if self.jobs:
+            log.info(f"Resuming {len(self.jobs)} Last.fm indexing jobs.")
+
+        self.heartbeat = create_task(self.renew(), name="lastfm-index-lease")
+
+    async def stop(self: "Indexer") -> None:
+        if self.heartbeat:
+            self.heartbeat.cancel()
+
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+
+        await gather(*tasks, return_exceptions=True)
+        await self.bot.db.execute(
+            """
+            UPDATE lastfm.jobs
+            SET owner = NULL, leased_at = NULL
+            WHERE owner = $1
+            """,
+            self.owner,
+        )
+
+    async def claim(self: "Indexer") -> None:
+        for record in await self.bot.db.fetch(
+            """
+            UPDATE lastfm.jobs
+            SET owner = $1, leased_at = NOW()
+            WHERE user_id IN (
+                SELECT user_id
+                FROM lastfm.jobs
+                WHERE owner IS NULL
+                OR leased_at < NOW() - MAKE_INTERVAL(secs => $2)
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+            """,
+            self.owner,
+            self.lease,
+        ):
+            if record.user_id not in self.jobs:
+                self.schedule(Job(record))
+
+    async def renew(self: "Indexer") -> None:
+        while True:
+            await sleep(self.lease / 4)
+
+            try:
+                await self.bot.db.execute(
+                    """
+                    UPDATE lastfm.jobs
+                    SET leased_at = NOW()
+                    WHERE owner = $1
+                    """,
+                    self.owner,
+                )
+                await self.claim()
+            except CancelledError:
+                raise
+            except Exception:
+                log.exception("Failed to renew the Last.fm indexing leases!")
+
+    def schedule(self: "Indexer", job: Job) -> Job:
+        self.jobs[job.user_id] = job
+        self.tasks[job.user_id] = create_task(
+            self.run(job),
+            name=f"lastfm-index-{job.user_id}",
+        )
+
+        return job
+
+    async def enqueue(
+        self: "Indexer", user_id: int, username: str
+    ) -> Tuple[Optional[Job], bool]:
+        if job := self.jobs.get(user_id):
+            return job, False
+
+        record = await self.bot.db.fetchrow(
+            """
+            INSERT INTO lastfm.jobs (user_id, username, owner, leased_at)
+            VALUES ($1, $2, $3, NOW())
+            ON CONFLICT (user_id) DO UPDATE
+            SET
+                owner = EXCLUDED.owner,
+                leased_at = EXCLUDED.leased_at,
+                username = EXCLUDED.username,
+                library = CASE
+                    WHEN lastfm.jobs.username = EXCLUDED.username
+                    THEN lastfm.jobs.library
+                END,
+                page = CASE
+                    WHEN lastfm.jobs.username = EXCLUDED.username
+                    THEN lastfm.jobs.page
+                    ELSE 0
+                END,
+                pages = CASE
+                    WHEN lastfm.jobs.username = EXCLUDED.username
+                    THEN lastfm.jobs.pages
+                    ELSE 0
+                END,
+                items = CASE
+                    WHEN lastfm.jobs.username = EXCLUDED.username
+                    THEN lastfm.jobs.items
+                    ELSE 0
+                END,
+                synced_at = CASE
+                    WHEN lastfm.jobs.username = EXCLUDED.username
+                    THEN lastfm.jobs.synced_at
+                END,
+                scrobbles = CASE
+                    WHEN lastfm.jobs.username = EXCLUDED.username
+                    THEN lastfm.jobs.scrobbles
+                END
+            WHERE lastfm.jobs.owner IS NULL
+            OR lastfm.jobs.leased_at < NOW() - MAKE_INTERVAL(secs => $4)
+            RETURNING *, (xmax = 0) AS created
+            """,
+            user_id,
+            username,
+            self.owner,
+            self.lease,
+        )
+        if not record:
+            # Another process holds a live lease on this job.
+            return None, False
+
+        return self.schedule(Job(record)), record.created
+
+    async def save(self: "Indexer", job: Job) -> None:
+        result = await self.bot.db.execute(
+            """
+            UPDATE lastfm.jobs
+            SET
+                library = $2,
+                page = $3,
+                pages = $4,
+                items = $5,
+                synced_at = $6,
+                scrobbles = $7,
+                updated_at = NOW(),
+                leased_at = NOW()
+            WHERE user_id = $1
+            AND owner = $8
+            """,
+            job.user_id,
+            job.library,
+            job.page,
+            job.pages,
+            job.items,
+            job.synced_at,
+            job.scrobbles,
+            self.owner,
+        )
+        if result == "UPDATE 0":
+            raise LeaseLost(f"Lost the lease on {job.username}'s indexing job")
+
+    async def run(self: "Indexer", job: Job) -> None:
+        try:
+            async with self.semaphore:
+                start = perf_counter()
+                await self.index(job)
+
+            async with self.bot.db.acquire() as connection:
+                async with connection.transaction():
+                    await self.cog.crown(connection, job.user_id)
+                    await connection.execute(
+                        """
+                        UPDATE lastfm.config
+                        SET synced_at = $2, scrobbles = $3
+                        WHERE user_id = $1
+                        """,
+                        job.user_id,
+                        job.synced_at,
+                        job.scrobbles,
+                    )
+            log.info(
+                f"Succesfully indexed {job.username}'s library "
+                f"in {perf_counter() - start:.2f}s."
+            )
+        except CancelledError:
+            # The row stays behind so the job resumes from its cursor.
+            self.jobs.pop(job.user_id, None)
+            self.tasks.pop(job.user_id, None)
+            raise
+        except LeaseLost as exception:
+            # Another process took the job over, it owns the row now.
+            job.error = exception
+            log.warning(str(exception))
+            self.jobs.pop(job.user_id, None)
+            self.tasks.pop(job.user_id, None)
+            job.finished.set()
+            return
+        except Exception as exception:
+            job.error = exception
+            log.exception(f"Failed to index {job.username}'s library!")
+
+        try:
+            await self.bot.db.execute(
+                """
+                DELETE FROM lastfm.jobs
+                WHERE user_id = $1
+                AND owner = $2
+                """,
+                job.user_id,
+                self.owner,
+            )
+        except Exception:
+            log.exception(f"Failed to remove {job.username}'s indexing job!")
+        finally:
+            self.jobs.pop(job.user_id, None)
+            self.tasks.pop(job.user_id, None)
+            job.finished.set()
+
+    async def index(self: "Indexer", job: Job) -> None:
+        user: LazyDict = await self.cog.client.request(
+            method="user.getinfo",
+            cached=False,
+            username=job.username,
+            slug="user",
+        )
+
+        if not job.library:
+            job.synced_at = int(time())
+            job.scrobbles = int(user.playcount)
+
+            async with self.bot.db.acquire() as connection:
+                async with connection.transaction():
+                    for table in libraries:
+                        await connection.execute(
+                            f"DELETE FROM lastfm.{table} WHERE user_id = $1",
+                            job.user_id,
+                        )
+
+                    # Force a full index until one finishes, sync would
+                    # otherwise apply deltas onto a partial library.
+                    await connection.execute(
+                        """
+                        UPDATE lastfm.config
+                        SET synced_at = NULL, scrobbles = NULL
+                        WHERE user_id = $1
+                        """,
+                        job.user_id,
+                    )
+
+            job.library = libraries[0]
+            await self.save(job)
+
+        for library in libraries[libraries.index(job.library) :]:
+            if library != job.library:
+                job.library, job.page = library, 0
+
+            job.pages = ceil(int(user.get(f"{library[:-1]}_count", 0)) / 1000)
+            completed: Set[int] = set()
+
+            async for page, items in self.cog.index(
+                user,
+                library,
+                range(job.page + 1, job.pages + 1),
+            ):
+                await self.cog.store(job.user_id, user.name, library, items)
+
+                job.items += len(items)
+                completed.add(page)
+                while job.page + 1 in completed:
+                    job.page += 1
+
+                await self.save(job)
@@ -1,21 +1,29 @@
-from asyncio import gather, sleep
-from math import ceil
-from time import perf_counter
-from typing import Any, AsyncGenerator, List, Optional, Tuple
-
-from discord import Color, Embed, HTTPException, Member, Message, NotFound
-from discord.ext.commands import Cog, command, group, param
+from asyncio import (
+    FIRST_COMPLETED,
+    Task,
+    TimeoutError,
+    create_task,
+    gather,
+    wait,
+    wait_for,
+)
+from collections import Counter, OrderedDict
+from time import perf_counter, time
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Set, Tuple
+
+from discord import Color, Embed, Guild, HTTPException, Member, Message, NotFound
+from discord.ext.commands import Cog, Range, command, group, param
 from discord.ext.commands.context import Context
 from humanize import intcomma as comma
-from munch import Munch
 from yarl import URL
 
 from tools.kayo import Kayo
-from tools.managers import Context, Username, database, logging
-from tools.utilities import Error, plural, shorten
+from tools.managers import Context, LazyDict, Username, database, logging
+from tools.utilities import Error, image, plural, shorten
 
 from .client import Client
 from .converters import Album, Artist, Timeframe, Track
+from .indexer import Indexer, Job
 
 log = logging.getLogger(__name__)
 
@@ -24,12 +32,33 @@ class Lastfm(Cog):
     def __init__(self, bot: Kayo):
         self.bot: Kayo = bot
         self.client = Client()
+        self.indexer = Indexer(self)
         self.tasks: List[int] = []
+        self.registered: Set[int] = set()
+        self.playing: OrderedDict[str, Tuple[str, str]] = OrderedDict()
 
     def url(self: "Lastfm", value: str) -> URL:
         return URL(f"https://last.fm/music/{value}")
 
+    def members(self: "Lastfm", guild: Guild) -> Set[int]:
+        return {member.id for member in guild.members if member.id in self.registered}
+
+    async def cog_load(self: "Lastfm"):
+        self.registered = {
+            record.user_id
+            for record in await self.bot.db.fetch(
+                """
+                SELECT user_id
+                FROM lastfm.config
+                """
+            )
+        }
+        await self.indexer.start()
+        self.bot.ioloop.add_callback(self.populate)
+        return await super().cog_load()
+
     async def cog_unload(self: "Lastfm"):
+        await self.indexer.stop()
         await self.client.close()
         return await super().cog_unload()
 
@@ -45,14 +74,7 @@ class Lastfm(Cog):
             return True
 
         if not (
-            data := await self.bot.db.fetchrow(
-                """
-                SELECT *
-                FROM lastfm.config
-                WHERE user_id = $1
-                """,
-                ctx.author.id,
-            )
+            data := await self.bot.db.fetchrow_named("lastfm.config", ctx.author.id)
         ):
             raise Error("You haven't connected your Last.fm account!")
 
@@ -60,34 +82,547 @@ class Lastfm(Cog):
         return True
 
     async def index(
-        self: "Lastfm", user: Munch | database.Record
-    ) -> AsyncGenerator[Tuple[str, List[Any]], None]:
-        if isinstance(user, database.Record):
-            user = await self.client.request(
-                method="user.getinfo",
-                username=user.username,
-                slug="user",
+        self: "Lastfm",
+        user: LazyDict,
+        library: str,
+        pages: Iterable[int],
+        concurrency: int = 4,
+    ) -> AsyncGenerator[Tuple[int, List[Any]], None]:
+        pages = iter(pages)
+        pending: Dict[Task, int] = {}
+
+        try:
+            while True:
+                for page in pages:
+                    pending[
+                        create_task(
+                            self.client.request(
+                                method=f"user.gettop{library}",
+                                cached=False,
+                                slug=f"top{library}.{library[:-1]}",
+                                username=user.name,
+                                limit=1000,
+                                page=page,
+                            )
+                        )
+                    ] = page
+                    if len(pending) >= concurrency:
+                        break
+
+                if not pending:
+                    break
+
+                done, _ = await wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result() or []
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def progress(self: "Lastfm", ctx: Context, job: Job) -> None:
+        while not job.finished.is_set():
+            try:
+                await wait_for(job.finished.wait(), timeout=5)
+            except TimeoutError:
+                await ctx.neutral(job.progress, patch=ctx.response)
+
+    async def sync(
+        self: "Lastfm",
+        user_id: int,
+        config: database.Record,
+        pages: int = 5,
+    ) -> Optional[int]:
+        if not config.synced_at or config.scrobbles is None:
+            return
+
+        user = await self.client.request(
+            method="user.getinfo",
+            cached=False,
+            username=config.username,
+            slug="user",
+        )
+        synced_at = int(time())
+        expected = int(user.playcount) - config.scrobbles
+        if not 0 <= expected <= pages * 1000:
+            return
+
+        tracks: List[LazyDict] = []
+        for page in range(1, pages + 1) if expected else ():
+            recent = await self.client.request(
+                method="user.getrecenttracks",
+                cached=False,
+                slug="recenttracks",
+                username=config.username,
+                limit=1000,
+                page=page,
+                **{"from": config.synced_at, "to": synced_at},
             )
+            items = recent.track or []
+            if isinstance(items, dict):
+                items = [items]
 
-        for library in ("artists", "albums", "tracks"):
-            pages = ceil(int(user.get(f"{library[:-1]}_count", 0)) / 1000)
+            tracks.extend(track for track in items if track.date)
+            if page >= int(recent["@attr"].totalPages or 1):
+                break
 
-            items = []
-            for page in await gather(
+        if len(tracks) != expected:
+            log.info(
+                f"Detected drift for {config.username} ({len(tracks)}/{expected} scrobbles)."
+            )
+            return
+
+        artists: Counter = Counter()
+        albums: Counter = Counter()
+        songs: Counter = Counter()
+        for track in tracks:
+            artist = track.artist["#text"]
+
+            artists[artist] += 1
+            songs[(artist, track.name)] += 1
+            if album := (track.album or {}).get("#text"):
+                albums[(artist, album)] += 1
+
+        async with self.bot.db.acquire() as connection:
+            async with connection.transaction():
+                await connection.executemany(
+                    """
+                    INSERT INTO lastfm.artists
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (user_id, artist)
+                    DO UPDATE SET
+                    plays = lastfm.artists.plays + EXCLUDED.plays
+                    """,
+                    [
+                        (user_id, config.username, artist, plays)
+                        for artist, plays in artists.items()
+                    ],
+                )
+                await connection.executemany(
+                    """
+                    INSERT INTO lastfm.albums
+                    VALUES ($1, $2, $3, $4, $5)
+                    ON CONFLICT (user_id, artist, album)
+                    DO UPDATE SET
+                    plays = lastfm.albums.plays + EXCLUDED.plays
+                    """,
+                    [
+                        (user_id, config.username, artist, album, plays)
+                        for (artist, album), plays in albums.items()
+                    ],
+                )
+                await connection.executemany(
+                    """
+                    INSERT INTO lastfm.tracks
+                    VALUES ($1, $2, $3, $4, $5)
+                    ON CONFLICT (user_id, artist, track)
+                    DO UPDATE SET
+                    plays = lastfm.tracks.plays + EXCLUDED.plays
+                    """,
+                    [
+                        (user_id, config.username, artist, track, plays)
+                        for (artist, track), plays in songs.items()
+                    ],
+                )
+                await self.crown(connection, user_id, artists=list(artists))
+                await connection.execute(
+                    """
+                    UPDATE lastfm.config
+                    SET synced_at = $2, scrobbles = $3
+                    WHERE user_id = $1
+                    """,
+                    user_id,
+                    synced_at,
+                    int(user.playcount),
+                )
+
+        return expected
+
+    async def store(
+        self: "Lastfm",
+        user_id: int,
+        username: str,
+        library: str,
+        items: List[LazyDict],
+    ) -> None:
+        if library == "artists":
+            key = "artist"
+            records = [
+                (user_id, username, artist.name, int(artist.playcount))
+                for artist in items
+            ]
+
+        elif library == "albums":
+            key = "artist, album"
+            records = [
+                (user_id, username, album.artist.name, album.name, int(album.playcount))
+                for album in items
+            ]
+
+        else:
+            key = "artist, track"
+            records = [
+                (user_id, username, track.artist.name, track.name, int(track.playcount))
+                for track in items
+            ]
+
+        if not records:
+            return
+
+        # asyncpg has no binary COPY encoder for CITEXT,
+        # so the keys are staged as TEXT and cast on insert.
+        columns = key.split(", ")
+        staged = ", ".join(f"{column} TEXT NOT NULL" for column in columns)
+        casted = ", ".join(f"{column}::CITEXT" for column in columns)
+
+        async with self.bot.db.acquire() as connection:
+            async with connection.transaction():
+                await connection.execute(
+                    f"""
+                    CREATE TEMPORARY TABLE staging (
+                        user_id BIGINT NOT NULL,
+                        username TEXT NOT NULL,
+                        {staged},
+                        plays BIGINT NOT NULL
+                    ) ON COMMIT DROP
+                    """
+                )
+                await connection.copy_records_to_table("staging", records=records)
+                await connection.execute(
+                    f"""
+                    INSERT INTO lastfm.{library} (user_id, username, {key}, plays)
+                    SELECT DISTINCT ON ({casted}) user_id, username, {casted}, plays
+                    FROM staging
+                    ORDER BY {casted}, plays DESC
+                    ON CONFLICT (user_id, {key})
+                    DO UPDATE SET
+                    plays = GREATEST(lastfm.{library}.plays, EXCLUDED.plays)
+                    """
+                )
+
+    async def crown(
+        self: "Lastfm",
+        connection: database.Connection,
+        user_id: int,
+        guild_id: Optional[int] = None,
+        artists: Optional[List[str]] = None,
+    ) -> None:
+        await connection.execute(
+            """
+            INSERT INTO lastfm.crowns (guild_id, user_id, username, artist, plays)
+            SELECT DISTINCT ON (listeners.guild_id, artists.artist)
+                listeners.guild_id,
+                artists.user_id,
+                artists.username,
+                artists.artist,
+                artists.plays
+            FROM lastfm.listeners
+            JOIN lastfm.artists
+            ON artists.user_id = listeners.user_id
+            WHERE listeners.guild_id IN (
+                SELECT guild_id
+                FROM lastfm.listeners
+                WHERE user_id = $1
+                AND ($2::BIGINT IS NULL OR guild_id = $2)
+            )
+            AND artists.artist IN (
+                SELECT artist
+                FROM lastfm.artists
+                WHERE user_id = $1
+                AND ($3::TEXT[] IS NULL OR artist = ANY($3::TEXT[]::CITEXT[]))
+                UNION
+                SELECT artist
+                FROM lastfm.crowns
+                WHERE user_id = $1
+            )
+            ORDER BY listeners.guild_id, artists.artist, artists.plays DESC
+            ON CONFLICT (guild_id, artist)
+            DO UPDATE SET
+            user_id = EXCLUDED.user_id,
+            username = EXCLUDED.username,
+            plays = EXCLUDED.plays
+            """,
+            user_id,
+            guild_id,
+            artists,
+        )
+        await connection.execute(
+            """
+            DELETE FROM lastfm.crowns
+            WHERE user_id = $1
+            AND NOT EXISTS (
+                SELECT 1
+                FROM lastfm.artists
+                WHERE artists.user_id = $1
+                AND artists.artist = lastfm.crowns.artist
+            )
+            """,
+            user_id,
+        )
+
+    async def uncrown(
+        self: "Lastfm",
+        connection: database.Connection,
+        guild_id: int,
+        user_ids: List[int],
+    ) -> None:
+        await connection.execute(
+            """
+            DELETE FROM lastfm.listeners
+            WHERE guild_id = $1
+            AND user_id = ANY($2::BIGINT[])
+            """,
+            guild_id,
+            user_ids,
+        )
+        artists = await connection.fetch(
+            """
+            DELETE FROM lastfm.crowns
+            WHERE guild_id = $1
+            AND user_id = ANY($2::BIGINT[])
+            RETURNING artist::TEXT
+            """,
+            guild_id,
+            user_ids,
+        )
+        if not artists:
+            return
+
+        await connection.execute(
+            """
+            INSERT INTO lastfm.crowns (guild_id, user_id, username, artist, plays)
+            SELECT DISTINCT ON (artists.artist)
+                listeners.guild_id,
+                artists.user_id,
+                artists.username,
+                artists.artist,
+                artists.plays
+            FROM lastfm.listeners
+            JOIN lastfm.artists
+            ON artists.user_id = listeners.user_id
+            WHERE listeners.guild_id = $1
+            AND artists.artist = ANY($2::TEXT[]::CITEXT[])
+            ORDER BY artists.artist, artists.plays DESC
+            """,
+            guild_id,
+            [record.artist for record in artists],
+        )
+
+    async def rebuild(
+        self: "Lastfm", connection: database.Connection, guild_ids: List[int]
+    ) -> None:
+        await connection.execute(
+            """
+            DELETE FROM lastfm.crowns
+            WHERE guild_id = ANY($1::BIGINT[])
+            """,
+            guild_ids,
+        )
+        await connection.execute(
+            """
+            INSERT INTO lastfm.crowns (guild_id, user_id, username, artist, plays)
+            SELECT DISTINCT ON (listeners.guild_id, artists.artist)
+                listeners.guild_id,
+                artists.user_id,
+                artists.username,
+                artists.artist,
+                artists.plays
+            FROM lastfm.listeners
+            JOIN lastfm.artists
+            ON artists.user_id = listeners.user_id
+            WHERE listeners.guild_id = ANY($1::BIGINT[])
+            ORDER BY listeners.guild_id, artists.artist, artists.plays DESC
+            """,
+            guild_ids,
+        )
+
+    async def populate(self: "Lastfm") -> None:
+        await self.bot.wait_until_ready()
+
+        current = {
+            (guild.id, user_id)
+            for guild in self.bot.guilds
+            for user_id in self.members(guild)
+        }
+        stored = {
+            (record.guild_id, record.user_id)
+            for record in await self.bot.db.fetch(
+                """
+                SELECT guild_id, user_id
+                FROM lastfm.listeners
+                """
+            )
+        }
+
+        removed: Dict[int, List[int]] = {}
+        for guild_id, user_id in stored - current:
+            removed.setdefault(guild_id, []).append(user_id)
+
+        added = current - stored
+        async with self.bot.db.acquire() as connection:
+            async with connection.transaction():
+                for guild_id, user_ids in removed.items():
+                    await self.uncrown(connection, guild_id, user_ids)
+
+                if added:
+                    await connection.copy_records_to_table(
+                        "listeners",
+                        schema_name="lastfm",
+                        records=list(added),
+                    )
+                    await self.rebuild(
+                        connection, list({guild_id for guild_id, _ in added})
+                    )
+
+        log.info(
+            f"Synchronized {len(current)} Last.fm listeners "
+            f"({len(added)} added, {len(stored - current)} removed)."
+        )
+
+    async def listen(self: "Lastfm", user_id: int) -> None:
+        self.registered.add(user_id)
+        if not (user := self.bot.get_user(user_id)):
+            return
+
+        await self.bot.db.executemany(
+            """
+            INSERT INTO lastfm.listeners (guild_id, user_id)
+            VALUES ($1, $2)
+            ON CONFLICT DO NOTHING
+            """,
+            [(guild.id, user_id) for guild in user.mutual_guilds],
+        )
+
+    @Cog.listener()
+    async def on_member_join(self: "Lastfm", member: Member) -> None:
+        if member.id not in self.registered:
+            return
+
+        async with self.bot.db.acquire() as connection:
+            async with connection.transaction():
+                await connection.execute(
+                    """
+                    INSERT INTO lastfm.listeners (guild_id, user_id)
+                    VALUES ($1, $2)
+                    ON CONFLICT DO NOTHING
+                    """,
+                    member.guild.id,
+                    member.id,
+                )
+                await self.crown(connection, member.id, member.guild.id)
+
+    @Cog.listener()
+    async def on_member_remove(self: "Lastfm", member: Member) -> None:
+        if member.id not in self.registered:
+            return
+
+        async with self.bot.db.acquire() as connection:
+            async with connection.transaction():
+                await self.uncrown(connection, member.guild.id, [member.id])
+
+    @Cog.listener()
+    async def on_guild_join(self: "Lastfm", guild: Guild) -> None:
+        if not (listeners := self.members(guild)):
+            return
+
+        async with self.bot.db.acquire() as connection:
+            async with connection.transaction():
+                await connection.executemany(
+                    """
+                    INSERT INTO lastfm.listeners (guild_id, user_id)
+                    VALUES ($1, $2)
+                    ON CONFLICT DO NOTHING
+                    """,
+                    [(guild.id, user_id) for user_id in listeners],
+                )
+                await self.rebuild(connection, [guild.id])
+
+    @Cog.listener()
+    async def on_guild_remove(self: "Lastfm", guild: Guild) -> None:
+        async with self.bot.db.acquire() as connection:
+            async with connection.transaction():
+                for table in ("listeners", "crowns"):
+                    await connection.execute(
+                        f"DELETE FROM lastfm.{table} WHERE guild_id = $1",
+                        guild.id,
+                    )
+
+    async def react(self: "Lastfm", message: Message, reactions: List[str]) -> None:
+        for reaction in reactions:
+            try:
+                await message.add_reaction(reaction)
+            except HTTPException:
+                break
+
+    async def now_playing(
+        self: "Lastfm", username: str
+    ) -> Optional[Tuple[LazyDict, LazyDict, LazyDict]]:
+        speculative: Optional[Task] = None
+        if playing := self.playing.get(username):
+            speculative = create_task(
+                self.client.request(
+                    method="track.getinfo",
+                    username=username,
+                    track=playing[1],
+                    artist=playing[0],
+                    slug="track",
+                )
+            )
+
+        try:
+            tracks, user = await gather(
                 *[
                     self.client.request(
-                        method=f"user.gettop{library}",
-                        slug=f"top{library}.{library[:-1]}",
-                        username=user.name,
-                        limit=1000,
-                        page=page + 1,
-                    )
-                    for page in range(pages)
+                        method="user.getrecenttracks",
+                        username=username,
+                        slug="recenttracks.track",
+                        limit=1,
+                    ),
+                    self.client.request(
+                        method="user.getinfo",
+                        username=username,
+                        slug="user",
+                    ),
                 ]
-            ):
-                items.extend(page)
+            )
+        except Exception:
+            if speculative:
+                speculative.cancel()
+
+            raise
+
+        if not tracks:
+            if speculative:
+                speculative.cancel()
+
+            return None
 
-            yield library, items
+        track = tracks[0]
+        artist = track.artist["#text"]
+
+        self.playing[username] = (artist, track.name)
+        self.playing.move_to_end(username)
+        if len(self.playing) > 10000:
+            self.playing.popitem(last=False)
+
+        if speculative and playing != (artist, track.name):
+            speculative.cancel()
+            speculative = None
+
+        info = (
+            await (
+                speculative
+                or self.client.request(
+                    method="track.getinfo",
+                    username=username,
+                    track=track.name,
+                    artist=artist,
+                    slug="track",
+                )
+            )
+            or track
+        )
+
+        return track, info, user
 
     @command(
         name="fm",
@@ -104,54 +639,20 @@ class Lastfm(Cog):
 
         member = member or ctx.author
 
-        if not (
-            data := await self.bot.db.fetchrow(
-                """
-                SELECT * 
-                FROM lastfm.config
-                WHERE user_id = $1
-                """,
-                member.id,
-            )
-        ):
+        if not (data := await self.bot.db.fetchrow_named("lastfm.config", member.id)):
             return await ctx.notice(
                 "You haven't connected your Last.fm account!"
                 if member == ctx.author
                 else f"`{member}` hasn't connected their Last.fm account!"
             )
 
-        tracks, user = await gather(
-            *[
-                self.client.request(
-                    method="user.getrecenttracks",
-                    username=data.username,
-                    slug="recenttracks.track",
-                    limit=1,
-                ),
-                self.client.request(
-                    method="user.getinfo",
-                    username=data.username,
-                    slug="user",
-                ),
-            ]
-        )
-        if not tracks:
+        if not (result := await self.now_playing(data.username)):
             return await ctx.notice(
                 f"Recent tracks aren't available for `{data.username}`!"
             )
 
-        track = tracks[0]
+        track, info, user = result
         artist = track.artist["#text"]
-        track.data = (
-            await self.client.request(
-                method="track.getinfo",
-                username=data.username,
-                track=track.name,
-                artist=artist,
-                slug="track",
-            )
-            or track
-        )
 
         embed = Embed(color=data.color)
         embed.set_author(
@@ -174,19 +675,18 @@ class Lastfm(Cog):
 
         embed.set_footer(
             text=(
-                f"Plays: {comma(track.data.userplaycount or 0)} ∙ "
+                f"Plays: {comma(info.userplaycount or 0)} ∙ "
                 f"Scrobbles: {comma(user.playcount)} ∙ "
                 f"Album: {shorten(track.album.get('#text', 'N/A'), 16)}"
             ),
         )
 
         message = await ctx.send(embed=embed)
-        reactions = data.reactions or ["🔥", "🗑"]
-        for reaction in reactions:
-            self.bot.ioloop.add_callback(
-                message.add_reaction,
-                reaction,
-            )
+        self.bot.ioloop.add_callback(
+            self.react,
+            message,
+            data.reactions or ["🔥", "🗑"],
+        )
 
         return message
 
@@ -220,7 +720,7 @@ class Lastfm(Cog):
         Connect your Last.fm account.
         """
 
-        if ctx.author.id in self.tasks:
+        if ctx.author.id in self.indexer:
             return await ctx.notice(
                 "Your current library is being indexed, please try again later!"
             )
@@ -231,104 +731,25 @@ class Lastfm(Cog):
             slug="user",
         )
 
-        self.tasks.append(ctx.author.id)
         await self.bot.db.execute(
             """
             INSERT INTO lastfm.config (user_id, username) 
             VALUES ($1, $2)
             ON CONFLICT (user_id) DO UPDATE
-            SET username = EXCLUDED.username
+            SET username = EXCLUDED.username,
+            synced_at = NULL,
+            scrobbles = NULL
             """,
             ctx.author.id,
             data.name,
         )
+        await self.listen(ctx.author.id)
+        await self.indexer.enqueue(ctx.author.id, data.name)
 
-        message = await ctx.approve(
+        return await ctx.approve(
             f"Your Last.fm account has been set as [`{data.name}`]({data.url})!"
         )
 
-        start = perf_counter()
-        await gather(
-            *[
-                self.bot.db.execute(query, ctx.author.id)
-                for query in (
-                    "DELETE FROM lastfm.artists WHERE user_id = $1",
-                    "DELETE FROM lastfm.albums WHERE user_id = $1",
-                    "DELETE FROM lastfm.tracks WHERE user_id = $1",
-                    "DELETE FROM lastfm.crowns WHERE user_id = $1",
-                )
-            ]
-        )
-
-        async for library, items in self.index(user=data):
-            if library == "artists":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.artists
-                    VALUES ($1, $2, $3, $4)
-                    ON CONFLICT (user_id, artist)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            data.name,
-                            artist.name,
-                            int(artist.playcount),
-                        )
-                        for artist in items
-                    ],
-                )
-
-            elif library == "albums":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.albums
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (user_id, artist, album)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            data.name,
-                            album.artist.name,
-                            album.name,
-                            int(album.playcount),
-                        )
-                        for album in items
-                    ],
-                )
-
-            elif library == "tracks":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.tracks
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (user_id, artist, track)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            data.name,
-                            track.artist.name,
-                            track.name,
-                            int(track.playcount),
-                        )
-                        for track in items
-                    ],
-                )
-
-        elapsed = perf_counter() - start
-        log.info(f"Succesfully indexed {data.name}'s library in {elapsed:.2f}s.")
-
-        self.tasks.remove(ctx.author.id)
-        return message
-
     @lastfm.command(name="update", aliases=["refresh", "index"])
     async def lastfm_update(self: "Lastfm", ctx: Context) -> Message:
         """
@@ -337,116 +758,43 @@ class Lastfm(Cog):
 
         if ctx.author.id in self.tasks:
             return await ctx.notice(
-                "Your library is already being indexed, please try again later!"
+                "Your library is already being refreshed, please try again later!"
             )
 
-        self.tasks.append(ctx.author.id)
-        await ctx.neutral("Starting index of your Last.fm library...")
-
-        start = perf_counter()
-        await gather(
-            *[
-                self.bot.db.execute(query, ctx.author.id)
-                for query in (
-                    "DELETE FROM lastfm.artists WHERE user_id = $1",
-                    "DELETE FROM lastfm.albums WHERE user_id = $1",
-                    "DELETE FROM lastfm.tracks WHERE user_id = $1",
-                    "DELETE FROM lastfm.crowns WHERE user_id = $1",
-                )
-            ]
-        )
+        if not (job := self.indexer.get(ctx.author.id)):
+            self.tasks.append(ctx.author.id)
+            start = perf_counter()
 
-        async for library, items in self.index(user=ctx.lastfm):
-            if library == "artists":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.artists
-                    VALUES ($1, $2, $3, $4)
-                    ON CONFLICT (user_id, artist)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            ctx.lastfm.username,
-                            artist.name,
-                            int(artist.playcount),
-                        )
-                        for artist in items
-                    ],
-                )
-                await self.bot.db.executemany(
-                    """
-                    UPDATE lastfm.crowns
-                    SET plays = $3
-                    WHERE user_id = $1
-                    AND artist = $2
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            artist.name,
-                            int(artist.playcount),
-                        )
-                        for artist in items
-                    ],
+            try:
+                scrobbles = await self.sync(ctx.author.id, ctx.lastfm)
+            finally:
+                self.tasks.remove(ctx.author.id)
+
+            if scrobbles is not None:
+                elapsed = perf_counter() - start
+                log.info(
+                    f"Succesfully synced {plural(scrobbles):scrobble} for {ctx.lastfm.username} in {elapsed:.2f}s."
                 )
 
-            elif library == "albums":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.albums
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (user_id, artist, album)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            ctx.lastfm.username,
-                            album.artist.name,
-                            album.name,
-                            int(album.playcount),
-                        )
-                        for album in items
-                    ],
+                return await ctx.approve(
+                    f"Your Last.fm library has been refreshed with {plural(scrobbles, md='`'):new scrobble}."
                 )
 
-            elif library == "tracks":
-                await self.bot.db.executemany(
-                    """
-                    INSERT INTO lastfm.tracks
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (user_id, artist, track)
-                    DO UPDATE SET
-                    plays = EXCLUDED.plays
-                    """,
-                    [
-                        (
-                            ctx.author.id,
-                            ctx.lastfm.username,
-                            track.artist.name,
-                            track.name,
-                            int(track.playcount),
-                        )
-                        for track in items
-                    ],
+            job, _ = await self.indexer.enqueue(ctx.author.id, ctx.lastfm.username)
+            if not job:
+                return await ctx.notice(
+                    "Your library is already being indexed, please try again later!"
                 )
 
-            await ctx.neutral(
-                f"Stored `{len(items):,}` {library} from your Last.fm library...",
+        await ctx.neutral(job.progress)
+        await self.progress(ctx, job)
+
+        if job.error:
+            return await ctx.notice(
+                "Your Last.fm library couldn't be indexed, please try again later!",
                 patch=ctx.response,
             )
 
-        elapsed = perf_counter() - start
-        log.info(
-            f"Succesfully indexed {ctx.lastfm.username}'s library in {elapsed:.2f}s."
-        )
-
-        await sleep(1)
-        self.tasks.remove(ctx.author.id)
         return await ctx.approve(
             "Your Last.fm library has been refreshed.", patch=ctx.response
         )
@@ -531,16 +879,7 @@ class Lastfm(Cog):
 
         member = member or ctx.author
 
-        if not (
-            data := await self.bot.db.fetchrow(
-                """
-                SELECT * 
-                FROM lastfm.config
-                WHERE user_id = $1
-                """,
-                member.id,
-            )
-        ):
+        if not (data := await self.bot.db.fetchrow_named("lastfm.config", member.id)):
             return await ctx.notice(
                 "You haven't connected your Last.fm account!"
                 if member == ctx.author
@@ -595,16 +934,7 @@ class Lastfm(Cog):
 
         member = member or ctx.author
 
-        if not (
-            data := await self.bot.db.fetchrow(
-                """
-                SELECT * 
-                FROM lastfm.config
-                WHERE user_id = $1
-                """,
-                member.id,
-            )
-        ):
+        if not (data := await self.bot.db.fetchrow_named("lastfm.config", member.id)):
             return await ctx.notice(
                 "You haven't connected your Last.fm account!"
                 if member == ctx.author
@@ -655,16 +985,7 @@ class Lastfm(Cog):
 
         member = member or ctx.author
 
-        if not (
-            data := await self.bot.db.fetchrow(
-                """
-                SELECT * 
-                FROM lastfm.config
-                WHERE user_id = $1
-                """,
-                member.id,
-            )
-        ):
+        if not (data := await self.bot.db.fetchrow_named("lastfm.config", member.id)):
             return await ctx.notice(
                 "You haven't connected your Last.fm account!"
                 if member == ctx.author
@@ -692,6 +1013,62 @@ class Lastfm(Cog):
             ),
         )
 
+    @lastfm.command(
+        name="chart",
+        aliases=["collage", "c"],
+    )
+    async def lastfm_chart(
+        self: "Lastfm",
+        ctx: Context,
+        member: Optional[Member],
+        timeframe: Timeframe = param(
+            default=Timeframe("7day"),
+            description="The backlog period.",
+        ),
+        size: Range[int, 2, 6] = param(
+            default=3,
+            description="The amount of rows and columns.",
+        ),
+    ) -> Message:
+        """
+        View a grid of your top album covers.
+        """
+
+        member = member or ctx.author
+
+        if not (data := await self.bot.db.fetchrow_named("lastfm.config", member.id)):
+            return await ctx.notice(
+                "You haven't connected your Last.fm account!"
+                if member == ctx.author
+                else f"`{member}` hasn't connected their Last.fm account!"
+            )
+
+        albums = await self.client.request(
+            method="user.gettopalbums",
+            slug="topalbums.album",
+            username=data.username,
+            period=timeframe.period,
+            limit=size**2,
+        )
+        if not albums:
+            return await ctx.notice(f"`{data.username}` doesn't have any top albums!")
+
+        async with ctx.typing():
+            chart = await image.chart(
+                self.bot.session,
+                [album.image[-1]["#text"] for album in albums],
+                columns=size,
+                rows=size,
+            )
+
+        embed = Embed(
+            color=ctx.lastfm.color,
+            title=f"{data.username}'s {timeframe} {size}x{size} album chart",
+        )
+        embed.set_image(url="attachment://chart.webp")
+
+        return await ctx.send(embed=embed, file=chart)
+
     @lastfm.command(
         name="toptracks",
         aliases=[
@@ -715,16 +1092,7 @@ class Lastfm(Cog):
 
         member = member or ctx.author
 
-        if not (
-            data := await self.bot.db.fetchrow(
-                """
-                SELECT * 
-                FROM lastfm.config
-                WHERE user_id = $1
-                """,
-                member.id,
-            )
-        ):
+        if not (data := await self.bot.db.fetchrow_named("lastfm.config", member.id)):
             return await ctx.notice(
                 "You haven't connected your Last.fm account!"
                 if member == ctx.author
@@ -769,16 +1137,10 @@ class Lastfm(Cog):
         View the top listeners for an artist.
         """
 
-        records = await self.bot.db.fetch(
-            """
-            SELECT user_id, username, plays
-            FROM lastfm.artists
-            WHERE user_id = ANY($2::BIGINT[])
-            AND artist = $1
-            ORDER BY plays DESC
-            """,
+        records = await self.bot.db.fetch_named(
+            "lastfm.whoknows.artist",
             artist,
-            [user.id for user in ctx.guild.members],
+            ctx.guild.id,
         )
         if not records:
             return await ctx.notice(
@@ -824,18 +1186,11 @@ class Lastfm(Cog):
         View the top listeners for an album.
         """
 
-        records = await self.bot.db.fetch(
-            """
-            SELECT user_id, username, plays
-            FROM lastfm.albums
-            WHERE user_id = ANY($3::BIGINT[])
-            AND album = $1
-            AND artist = $2
-            ORDER BY plays DESC
-            """,
+        records = await self.bot.db.fetch_named(
+            "lastfm.whoknows.album",
             album.name,
             album.artist,
-            [user.id for user in ctx.guild.members],
+            ctx.guild.id,
         )
         if not records:
             return await ctx.notice(
@@ -881,18 +1236,11 @@ class Lastfm(Cog):
         View the top listeners for a track.
         """
 
-        records = await self.bot.db.fetch(
-            """
-            SELECT user_id, username, plays
-            FROM lastfm.tracks
-            WHERE user_id = ANY($3::BIGINT[])
-            AND track = $1
-            AND artist = $2
-            ORDER BY plays DESC
-            """,
+        records = await self.bot.db.fetch_named(
+            "lastfm.whoknows.track",
             track.name,
             track.artist,
-            [user.id for user in ctx.guild.members],
+            ctx.guild.id,
         )
         if not records:
             return await ctx.notice(
@@ -921,3 +1269,41 @@ class Lastfm(Cog):
             ),
             counter=False,
         )
+
+    @lastfm.command(
+        name="crowns",
+        aliases=["crown"],
+    )
+    async def lastfm_crowns(
+        self: "Lastfm",
+        ctx: Context,
+        member: Optional[Member],
+    ) -> Message:
+        """
+        View the artists you're the top listener of.
+        """
+
+        member = member or ctx.author
+
+        records = await self.bot.db.fetch_named(
+            "lastfm.crowns",
+            ctx.guild.id,
+            member.id,
+        )
+        if not records:
+            return await ctx.notice(
+                "You don't have any crowns in this server!"
+                if member == ctx.author
+                else f"`{member}` doesn't have any crowns in this server!"
+            )
+
+        return await ctx.paginate(
+            [
+                f"[{record.artist}]({self.url(record.artist)}) ({plural(record.plays):play})"
+                for record in records
+            ],
+            embed=Embed(
+                color=ctx.lastfm.color,
+                title=f"{member.name}'s crowns",
+            ),
+        )
@@ -3,7 +3,6 @@ from contextlib import suppress
 from io import BytesIO
 from json import dumps
 from re import search
-from sys import getsizeof
 from typing import Any, Dict, List, Optional, TypedDict
 
 from aiohttp.client_exceptions import ClientOSError, ClientResponseError
@@ -24,7 +23,6 @@ from discord.ext.tasks import loop
 from discord.utils import get
 from humanize import intword, naturalsize
 from jishaku.functools import executor_function
-from munch import DefaultMunch, Munch
 from typing_extensions import Set
 from xxhash import xxh32_hexdigest, xxh64_hexdigest
 from yarl import URL
@@ -33,7 +31,15 @@ from yt_dlp import DownloadError, YoutubeDL
 from config import Authorization
 from tools import services
 from tools.kayo import Kayo
-from tools.managers import Context, Username, logging
+from tools.managers import (
+    Classification,
+    Context,
+    FileTooLarge,
+    LazyDict,
+    Username,
+    logging,
+    wrap,
+)
 from tools.services import InstagramPost, InstagramProfile, InstagramStoryItem
 from tools.utilities import plural, shorten
 
@@ -263,7 +269,7 @@ class Media(Cog):
         await self.bot.wait_until_ready()
 
     @executor_function
-    def extract_data(self: "Media", url: URL | str, **params) -> Optional[Munch]:
+    def extract_data(self: "Media", url: URL | str, **params) -> Optional[LazyDict]:
         """
         Asynchronously run YouTubeDL.
         """
@@ -279,28 +285,16 @@ class Media(Cog):
             return
 
         if data:
-            return DefaultMunch.fromDict(data)  # type: ignore
+            return wrap(data)
 
-    @Cog.listener("on_message")
-    async def check_service(self: "Media", message: Message):
+    @Cog.listener("on_media_message")
+    async def check_service(
+        self: "Media", message: Message, classification: Classification
+    ):
         """
         Automatically repost social media services.
         """
 
-        if (
-            message.author.bot
-            or not message.guild
-            or not message.content
-            or not message.content.lower().startswith(
-                (
-                    "kayo",
-                    "slut",
-                    message.guild.me.display_name,
-                )
-            )
-        ):
-            return
-
         ctx = await self.bot.get_context(message)
 
         for service, pattern in self.services.items():
@@ -392,30 +386,38 @@ class Media(Cog):
 
             return await ctx.paginate(embeds)
 
-        buffer: bytes = await self.bot.session.request(post.video_url)
-        if getsizeof(buffer) > ctx.guild.filesize_limit:
+        try:
+            buffer = await self.bot.session.stream(
+                post.video_url,
+                limit=ctx.guild.filesize_limit,
+            )
+        except FileTooLarge as exception:
             return await ctx.notice(
-                f"The video exceeds the maximum file size limit! (`{naturalsize(ctx.guild.filesize_limit)}`/`{naturalsize(getsizeof(buffer))}`)"
+                f"The video exceeds the maximum file size limit! (`{naturalsize(exception.limit)}`/`{naturalsize(exception.size)}`)"
             )
 
         return await ctx.send(
             embed=embed,
             file=File(
-                BytesIO(buffer),
+                buffer,
                 filename=f"TikTok{xxh64_hexdigest(aweme_id)}.mp4",
             ),
         )
 
     @Cog.listener()
     async def on_youtube_request(self: "Media", ctx: Context, url: URL) -> Message:
-        data: Optional[Munch] = await self.extract_data(url)
+        data: Optional[LazyDict] = await self.extract_data(url)
         if not data:
             return await ctx.notice("That YouTube video could not be found!")
 
-        buffer: bytes = await self.bot.session.request(data.url)
-        if getsizeof(buffer) > ctx.guild.filesize_limit:
+        try:
+            buffer = await self.bot.session.stream(
+                data.url,
+                limit=ctx.guild.filesize_limit,
+            )
+        except FileTooLarge as exception:
             return await ctx.notice(
-                f"The video exceeds the maximum file size limit! (`{naturalsize(ctx.guild.filesize_limit)}`/`{naturalsize(getsizeof(buffer))}`)"
+                f"The video exceeds the maximum file size limit! (`{naturalsize(exception.limit)}`/`{naturalsize(exception.size)}`)"
             )
 
         embed = Embed(
@@ -435,7 +437,7 @@ class Media(Cog):
         return await ctx.send(
             embed=embed,
             file=File(
-                BytesIO(buffer),
+                buffer,
                 filename=f"{data.title}.{data.ext}",
             ),
         )
@@ -444,16 +446,20 @@ class Media(Cog):
     async def on_facebook_request(
         self: "Media", ctx: Context, username: str, slug: str
     ) -> Message:
-        data: Optional[Munch] = await self.extract_data(
+        data: Optional[LazyDict] = await self.extract_data(
             f"https://facebook.com/{username}/videos/{slug}"
         )
         if not data:
             return await ctx.notice("That Facebook video could not be found!")
 
-        buffer: bytes = await self.bot.session.request(data.url)
-        if getsizeof(buffer) > ctx.guild.filesize_limit:
+        try:
+            buffer = await self.bot.session.stream(
+                data.url,
+                limit=ctx.guild.filesize_limit,
+            )
+        except FileTooLarge as exception:
             return await ctx.notice(
-                f"The video exceeds the maximum file size limit! (`{naturalsize(ctx.guild.filesize_limit)}`/`{naturalsize(getsizeof(buffer))}`)"
+                f"The video exceeds the maximum file size limit! (`{naturalsize(exception.limit)}`/`{naturalsize(exception.size)}`)"
             )
 
         embed = Embed(
@@ -474,7 +480,7 @@ class Media(Cog):
         return await ctx.send(
             embed=embed,
             file=File(
-                BytesIO(buffer),
+                buffer,
                 filename=f"{data.title}.{data.ext}",
             ),
         )
@@ -483,21 +489,25 @@ class Media(Cog):
     async def on_soundcloud_request(
         self: "Media", ctx: Context, username: str, slug: str
     ) -> Message:
-        data: Optional[Munch] = await self.extract_data(
+        data: Optional[LazyDict] = await self.extract_data(
             f"https://soundcloud.com/{username}/{slug}"
         )
         if not data:
             return await ctx.notice("That SoundCloud track could not be found!")
 
-        buffer: bytes = await self.bot.session.request(data.formats[-1].url)
-        if getsizeof(buffer) > ctx.guild.filesize_limit:
+        try:
+            buffer = await self.bot.session.stream(
+                data.formats[-1].url,
+                limit=ctx.guild.filesize_limit,
+            )
+        except FileTooLarge as exception:
             return await ctx.notice(
-                f"The audio exceeds the maximum file size limit! (`{naturalsize(ctx.guild.filesize_limit)}`/`{naturalsize(getsizeof(buffer))}`)"
+                f"The audio exceeds the maximum file size limit! (`{naturalsize(exception.limit)}`/`{naturalsize(exception.size)}`)"
             )
 
         return await ctx.send(
             file=File(
-                BytesIO(buffer),
+                buffer,
                 filename=f"{data.title}.{data.ext}",
             ),
         )
@@ -506,21 +516,25 @@ class Media(Cog):
     async def on_soundgasm_request(
         self: "Media", ctx: Context, username: str, slug: str
     ) -> Message:
-        data: Optional[Munch] = await self.extract_data(
+        data: Optional[LazyDict] = await self.extract_data(
             f"https://soundgasm.net/u/{username}/{slug}"
         )
         if not data:
             return await ctx.notice("That SoundGasm track could not be found!")
 
-        buffer: bytes = await self.bot.session.request(data.url)
-        if getsizeof(buffer) > ctx.guild.filesize_limit:
+        try:
+            buffer = await self.bot.session.stream(
+                data.url,
+                limit=ctx.guild.filesize_limit,
+            )
+        except FileTooLarge as exception:
             return await ctx.notice(
-                f"The audio exceeds the maximum file size limit! (`{naturalsize(getsizeof(buffer))}`/`{naturalsize(ctx.guild.filesize_limit)}`)"
+                f"The audio exceeds the maximum file size limit! (`{naturalsize(exception.limit)}`/`{naturalsize(exception.size)}`)"
             )
 
         return await ctx.send(
             file=File(
-                BytesIO(buffer),
+                buffer,
                 filename=f"{data.title}.{data.ext}",
             ),
         )
@@ -529,21 +543,25 @@ class Media(Cog):
     async def on_bandcamp_request(
         self: "Media", ctx: Context, username: str, slug: str
     ) -> Message:
-        data: Optional[Munch] = await self.extract_data(
+        data: Optional[LazyDict] = await self.extract_data(
             f"https://{username}.bandcamp.com/slug/{id}"
         )
         if not data:
             return await ctx.notice("That BandCamp track could not be found!")
 
-        buffer: bytes = await self.bot.session.request(data.url)
-        if getsizeof(buffer) > ctx.guild.filesize_limit:
+        try:
+            buffer = await self.bot.session.stream(
+                data.url,
+                limit=ctx.guild.filesize_limit,
+            )
+        except FileTooLarge as exception:
             return await ctx.notice(
-                f"The audio exceeds the maximum file size limit! (`{naturalsize(ctx.guild.filesize_limit)}`/`{naturalsize(getsizeof(buffer))}`)"
+                f"The audio exceeds the maximum file size limit! (`{naturalsize(exception.limit)}`/`{naturalsize(exception.size)}`)"
             )
 
         return await ctx.send(
             file=File(
-                BytesIO(buffer),
+                buffer,
                 filename=f"{data['title']}.{data.ext}",
             ),
         )
@@ -565,7 +583,7 @@ class Media(Cog):
         """
 
         await ctx.typing()
-        data: Munch = await self.bot.session.request(
+        data: LazyDict = await self.bot.session.request(
             "https://www.pinterest.com/resource/UserResource/get/",
             params={
                 "source_url": f"/{username}/",
@@ -858,7 +876,7 @@ class Media(Cog):
             )
 
         await ctx.prompt(
-            f"Found {plural(user.posts, md='**'):post} by [`{user.name}`]({user.url}), would you like to continue?"
+            f"Found {plural(user.count, md='**'):post} by [`{user.name}`]({user.url}), would you like to continue?"
         )
 
         channel = await ctx.guild.create_text_channel(
@@ -871,24 +889,42 @@ class Media(Cog):
             f"Beginning the upload task for [`{user.name}`]({user.url}) in {channel.mention}..."
         )
 
-        for post in user.posts:
-            text = post.caption
-            prepared: List[File] = []
+        uploaded = 0
+        async for posts in services.onlyfans.pages(self.bot.session, user):
+            for post in posts:
+                uploaded += 1
+                text = post.caption
+                prepared: List[File] = []
 
-            for file in await post.files(self.bot.session):
-                try:
-                    buffer = await self.bot.session.request(file.url)
-                except (ClientOSError, TimeoutError):
-                    continue
-
-                prepared.append(
-                    File(
-                        BytesIO(buffer),
-                        filename=f"{user.name}-{post.id}-{xxh32_hexdigest(file.url)}.{'png' if file.mime == 'IMAGE' else 'mp4'}",
+                for file in await post.files(self.bot.session):
+                    try:
+                        buffer = await self.bot.session.stream(
+                            file.url,
+                            limit=ctx.guild.filesize_limit,
+                        )
+                    except (ClientOSError, TimeoutError, FileTooLarge):
+                        continue
+
+                    prepared.append(
+                        File(
+                            buffer,
+                            filename=f"{user.name}-{post.id}-{xxh32_hexdigest(file.url)}.{'png' if file.mime == 'IMAGE' else 'mp4'}",
+                        )
                     )
-                )
 
-                if len(prepared) == 5:
+                    if len(prepared) == 5:
+                        try:
+                            await channel.send(
+                                content=text,
+                                files=prepared,
+                            )
+                        except HTTPException:
+                            pass
+
+                        text = None
+                        prepared.clear()
+
+                if prepared:
                     try:
                         await channel.send(
                             content=text,
@@ -897,18 +933,6 @@ class Media(Cog):
                     except HTTPException:
                         pass
 
-                    text = None
-                    prepared.clear()
-
-            if prepared:
-                try:
-                    await channel.send(
-                        content=text,
-                        files=prepared,
-                    )
-                except HTTPException:
-                    pass
-
         return await ctx.approve(
-            f"Finished uploading {plural(user.posts, md='**'):post} by [`{user.name}`]({user.url}) in {channel.mention}."
+            f"Finished uploading {plural(uploaded, md='**'):post} by [`{user.name}`]({user.url}) in {channel.mention}."
         )
@@ -41,7 +41,6 @@ from discord.utils import as_chunks, find, format_dt, get, utcnow
 from jishaku.codeblocks import Codeblock, codeblock_converter
 from jishaku.functools import executor_function
 from jishaku.math import mean_stddev
-from munch import Munch
 from PIL import Image as PILImage
 from pyppeteer import launch
 from pyppeteer.browser import Browser
@@ -54,7 +53,14 @@ from yarl import URL
 
 import config
 from tools.kayo import Kayo
-from tools.managers import Context, FlagConverter, Script, logging
+from tools.managers import (
+    Classification,
+    Context,
+    FlagConverter,
+    LazyDict,
+    Script,
+    logging,
+)
 from tools.managers.converters import Attachment, Domain, Image
 from tools.utilities import human_join, image, plural, sanitize, shorten
 
@@ -179,21 +185,18 @@ class Miscellaneous(Cog):
         output = colors[0]
         return Color.from_rgb(*output.rgb)
 
-    @Cog.listener("on_message")
+    @Cog.listener("on_color_message")
     async def color_search(
-        self: "Miscellaneous", message: Message
+        self: "Miscellaneous", message: Message, classification: Classification
     ) -> Optional[Message]:
         """
         Automatically show a panel for a color provided.
         """
 
-        if message.author.bot or not message.content:
-            return
-
         size: Tuple[int, int] = (128, 128)
         color: Optional[Color] = None
 
-        arguments = message.content.split()
+        arguments = classification.arguments
         if arguments[0] == "##":
             for attachment in message.attachments:
                 if (
@@ -984,10 +987,10 @@ class Miscellaneous(Cog):
         async with ctx.typing():
             language = code.language or "python"
 
-            runtimes: List[Munch] = await self.bot.session.request(
+            runtimes: List[LazyDict] = await self.bot.session.request(
                 "https://emkc.org/api/v2/piston/runtimes",
             )
-            runtime: Optional[Munch] = find(
+            runtime: Optional[LazyDict] = find(
                 lambda runtime: (
                     language.lower() == runtime.language
                     or language.lower() in runtime.aliases
@@ -1265,7 +1268,7 @@ class Miscellaneous(Cog):
         """
 
         async with ctx.typing():
-            results: List[Munch] = await self.bot.session.request(
+            results: List[LazyDict] = await self.bot.session.request(
                 "https://notsobot.com/api/search/google/images",
                 params={"query": query},
             )
@@ -1295,7 +1298,7 @@ class Miscellaneous(Cog):
         """
 
         async with ctx.typing():
-            data: Munch = await self.bot.session.request(
+            data: LazyDict = await self.bot.session.request(
                 f"https://api.mcsrvstat.us/2/{sanitize(server_ip)}"
             )
             if not data.online:
@@ -1457,7 +1460,7 @@ class Miscellaneous(Cog):
         Display information about a Fortnite cosmetic.
         """
 
-        result: Munch = await self.bot.session.request(
+        result: LazyDict = await self.bot.session.request(
             "GET",
             f"https://fortnite-api.com/v2/cosmetics/br/search",
             params=dict(
@@ -5,7 +5,7 @@ from enum import Enum
 from io import BytesIO
 from mimetypes import guess_type
 from random import randint
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Sequence, Union
 from zipfile import ZipFile
 
 from discord import (
@@ -18,6 +18,7 @@ from discord import (
     HTTPException,
     Member,
     Message,
+    Object,
     PartialEmoji,
     TextChannel,
     User,
@@ -26,6 +27,7 @@ from discord.ext.commands import (
     BucketType,
     Cog,
     CooldownMapping,
+    Greedy,
     Range,
     command,
     cooldown,
@@ -33,7 +35,7 @@ from discord.ext.commands import (
     has_permissions,
 )
 from discord.http import Route
-from discord.utils import format_dt
+from discord.utils import as_chunks, format_dt
 from jishaku.functools import executor_function
 from pydub import AudioSegment
 from pydub.silence import split_on_silence as silence
@@ -43,7 +45,7 @@ from xxhash import xxh64_hexdigest
 from tools.kayo import Kayo
 from tools.managers import Context, Sound, logging
 from tools.managers.database import Record
-from tools.utilities import Error, plural
+from tools.utilities import Error, plural, shorten
 
 log = logging.getLogger(__name__)
 
@@ -103,14 +105,8 @@ class Case:
         self.updated_at: Optional[datetime] = case.updated_at
 
     async def channel(self: "Case") -> Optional[TextChannel]:
-        if channel_id := await self.bot.db.fetchval(
-            """
-                SELECT mod_log_channel_id
-                FROM settings
-                WHERE guild_id = $1
-                """,
-            self.guild_id,
-        ):
+        settings = await self.bot.settings.get(self.guild_id)
+        if channel_id := settings.mod_log_channel_id:
             return self.bot.get_channel(channel_id)  # type: ignore
 
     async def embed(self: "Case") -> Embed:
@@ -157,14 +153,7 @@ class Case:
         try:
             message = await channel.send(embed=embed)
         except Forbidden:
-            await self.bot.db.execute(
-                """
-                UPDATE settings
-                SET mod_log_channel_id = NULL
-                WHERE guild_id = $1
-                """,
-                self.guild_id,
-            )
+            await self.bot.settings.update(self.guild_id, mod_log_channel_id=None)
             return
         except HTTPException:
             return
@@ -253,6 +242,119 @@ class Moderation(Cog):
 
         return case
 
+    async def insert_cases(
+        self: "Moderation",
+        ctx: Context,
+        targets: Sequence[Member | User | Object],
+        reason: str = "No reason provided",
+        action: Action = Action.UNKNOWN,
+        action_expriation: Optional[datetime] = None,
+        action_processed: bool = True,
+    ) -> List[Case]:
+        records = await self.bot.db.fetch(
+            """
+            WITH counter AS (
+                INSERT INTO case_counters (guild_id, last_id)
+                VALUES ($1, CARDINALITY($2::BIGINT[]))
+                ON CONFLICT (guild_id) DO UPDATE
+                SET last_id = case_counters.last_id + EXCLUDED.last_id
+                RETURNING last_id
+            )
+            INSERT INTO cases (
+                id,
+                guild_id,
+                target_id,
+                moderator_id,
+                reason,
+                action,
+                action_expiration,
+                action_processed
+            )
+            SELECT
+                counter.last_id - CARDINALITY($2::BIGINT[]) + target.ordinality,
+                $1, target.id, $3, $4, $5, $6, $7
+            FROM counter, UNNEST($2::BIGINT[]) WITH ORDINALITY AS target(id, ordinality)
+            RETURNING *
+            """,
+            ctx.guild.id,
+            [target.id for target in targets],
+            ctx.author.id,
+            reason,
+            int(action),
+            action_expriation,
+            action_processed,
+        )
+        cases = sorted(
+            (Case(record, self.bot) for record in records),
+            key=lambda case: case.id,
+        )
+
+        if cases:
+            self.bot.ioloop.add_callback(self.send_cases, cases)
+
+        return cases
+
+    async def send_cases(self: "Moderation", cases: List[Case]) -> Optional[Message]:
+        if len(cases) == 1:
+            return await cases[0].send()
+
+        case = cases[0]
+        channel = await case.channel()
+        if not channel:
+            return
+
+        moderator = self.bot.get_user(case.moderator_id) or await self.bot.fetch_user(
+            case.moderator_id
+        )
+
+        embed = Embed(color=0x2B2D31)
+        embed.set_author(
+            name=f"{moderator} ({moderator.id})",
+            icon_url=moderator.display_avatar,
+        )
+
+        lines: List[str] = []
+        length = 0
+        for index, target in enumerate(cases):
+            line = f"`#{target.id}` <@{target.target_id}> (`{target.target_id}`)"
+            length += len(line) + 1
+            if length > 3900:
+                lines.append(f"*and {plural(len(cases) - index):other}..*")
+                break
+
+            lines.append(line)
+
+        embed.description = "\n".join(lines)
+        embed.add_field(
+            name=f"Cases #{cases[0].id}-#{cases[-1].id} | {case.action}",
+            value=(
+                f"{format_dt(case.created_at)} ({format_dt(case.created_at, 'R')})\n>>> "
+                f"**Members:** {len(cases):,}\n"
+                f"**Reason:** {shorten(case.reason, 512)}"
+            ),
+        )
+
+        try:
+            message = await channel.send(embed=embed)
+        except Forbidden:
+            await self.bot.settings.update(case.guild_id, mod_log_channel_id=None)
+            return
+        except HTTPException:
+            return
+
+        await self.bot.db.execute(
+            """
+            UPDATE cases
+            SET message_id = $3
+            WHERE guild_id = $1
+            AND id = ANY($2::BIGINT[])
+            """,
+            case.guild_id,
+            [case.id for case in cases],
+            message.id,
+        )
+        return message
+
     async def collect_hashes(
         self: "Moderation",
         assets: List[Union[Asset, Emoji]],
@@ -354,6 +456,53 @@ class Moderation(Cog):
 
         return await ctx.add_check()
 
+    @command(
+        name="massban",
+        aliases=["banmany"],
+    )
+    @has_permissions(ban_members=True)
+    async def massban(
+        self: "Moderation",
+        ctx: Context,
+        users: Greedy[Member | User],
+        *,
+        reason: str = "No reason provided",
+    ) -> Message:
+        """
+        Ban multiple users from the server.
+        """
+
+        if not users:
+            return await ctx.send_help(ctx.command)
+
+        banned: List[Object] = []
+        async with ctx.typing():
+            for chunk in as_chunks(users, 200):
+                result = await ctx.guild.bulk_ban(
+                    chunk,
+                    reason=f"{ctx.author} / {reason}",
+                )
+                banned.extend(result.banned)
+
+        if not banned:
+            return await ctx.notice("I wasn't able to ban any of the provided users!")
+
+        await self.insert_cases(
+            ctx,
+            targets=banned,
+            reason=reason,
+            action=Action.BAN,
+        )
+
+        return await ctx.approve(
+            f"Banned {plural(banned, md='`'):user}"
+            + (
+                f", failed to ban {plural(len(users) - len(banned), md='`'):user}."
+                if len(banned) != len(users)
+                else "."
+            )
+        )
+
     @group(
         name="case",
         invoke_without_command=True,
@@ -92,6 +92,33 @@ class Network(Cog):
 
         log.info("Gracefully shutdown the API")
 
+    @route("/database")
+    async def database(self: "Network", request: Request) -> Response:
+        """
+        Exposes query latency and pool statistics.
+        """
+
+        return json_response(self.bot.db.report())
+
+    @route("/loop")
+    async def lag(self: "Network", request: Request) -> Response:
+        """
+        Exposes event loop lag and parser pool statistics.
+        """
+
+        return json_response(self.bot.monitor.report())
+
+    @route("/lastfm")
+    async def lastfm(self: "Network", request: Request) -> Response:
+        """
+        Exposes the Last.fm response cache statistics.
+        """
+
+        if not (cog := self.bot.get_cog("Lastfm")):
+            return json_response({"error": "Last.fm isn't loaded."}, status=503)
+
+        return json_response(cog.client.report())
+
     @route("/avatars/{user_id}")
     async def avatars(self: "Network", request: Request) -> Response:
         """
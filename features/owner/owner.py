@@ -32,16 +32,6 @@ class Owner(Cog):
     async def cog_check(self: "Owner", ctx: Context) -> bool:
         return await self.bot.is_owner(ctx.author)
 
-    async def cog_load(self):
-        self.bot.blacklist = [
-            row["user_id"]
-            for row in await self.bot.db.fetch(
-                """
-                SELECT user_id FROM blacklist
-                """,
-            )
-        ]
-
     @command(name="c")
     async def c(self: "Owner", ctx: Context) -> None:
         """
@@ -169,7 +159,7 @@ class Owner(Cog):
                 """,
                 user.id,
             )
-            self.bot.blacklist.remove(user.id)
+            self.bot.blacklist.discard(user.id)
         else:
             await self.bot.db.execute(
                 """
@@ -179,7 +169,7 @@ class Owner(Cog):
                 user.id,
                 reason,
             )
-            self.bot.blacklist.append(user.id)
+            self.bot.blacklist.add(user.id)
 
         await ctx.add_check()
 
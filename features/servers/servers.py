@@ -72,30 +72,13 @@ class Servers(Cog):
         """
 
         if not prefix:
-            prefix = (
-                await self.bot.db.fetchval(
-                    """
-                    SELECT prefix
-                    FROM settings
-                    WHERE guild_id = $1
-                    """,
-                    ctx.guild.id,
-                )
-                or config.prefix
-            )
+            settings = await self.bot.settings.get(ctx.guild.id)
 
-            return await ctx.neutral(f"Server prefix: `{prefix}`")
+            return await ctx.neutral(
+                f"Server prefix: `{settings.prefix or config.prefix}`"
+            )
 
-        await self.bot.db.execute(
-            """
-            INSERT INTO settings (guild_id, prefix)
-            VALUES ($1, $2)
-            ON CONFLICT (guild_id) DO UPDATE
-            SET prefix = EXCLUDED.prefix
-            """,
-            ctx.guild.id,
-            prefix.lower(),
-        )
+        await self.bot.settings.update(ctx.guild.id, prefix=prefix.lower())
         return await ctx.approve(f"Set the server prefix to `{prefix}`")
 
     @group(
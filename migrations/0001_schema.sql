@@ -169,6 +169,24 @@ BEGIN
 END;
 $$;
 
+CREATE OR REPLACE FUNCTION NOTIFY_BLACKLIST() RETURNS TRIGGER
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('blacklist', 'DELETE:' || OLD.user_id);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('blacklist', 'INSERT:' || NEW.user_id);
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER blacklist_notify
+AFTER INSERT OR DELETE ON blacklist
+FOR EACH ROW
+EXECUTE FUNCTION NOTIFY_BLACKLIST();
+
 -- CREATE OR REPLACE FUNCTION limit_backups()
 -- RETURNS TRIGGER AS $$
 -- DECLARE
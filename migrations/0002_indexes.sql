@@ -0,0 +1,22 @@
+CREATE INDEX IF NOT EXISTS artists_artist_idx
+ON lastfm.artists (artist, user_id)
+INCLUDE (username, plays);
+
+CREATE INDEX IF NOT EXISTS albums_artist_album_idx
+ON lastfm.albums (artist, album, user_id)
+INCLUDE (username, plays);
+
+CREATE INDEX IF NOT EXISTS tracks_artist_track_idx
+ON lastfm.tracks (artist, track, user_id)
+INCLUDE (username, plays);
+
+CREATE INDEX IF NOT EXISTS crowns_user_id_idx
+ON lastfm.crowns (user_id);
+
+CREATE INDEX IF NOT EXISTS names_user_id_idx
+ON metrics.names (user_id, updated_at DESC)
+INCLUDE (name, pomelo);
+
+CREATE INDEX IF NOT EXISTS avatars_user_id_idx
+ON metrics.avatars (user_id, updated_at DESC)
+INCLUDE (asset);
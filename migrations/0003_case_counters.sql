@@ -0,0 +1,23 @@
+LOCK TABLE cases IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS case_counters (
+    guild_id BIGINT PRIMARY KEY,
+    last_id BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO case_counters (guild_id, last_id)
+SELECT guild_id, MAX(id)
+FROM cases
+GROUP BY guild_id
+ON CONFLICT (guild_id) DO UPDATE
+SET last_id = GREATEST(case_counters.last_id, EXCLUDED.last_id);
+
+CREATE OR REPLACE FUNCTION NEXT_CASE(BIGINT) RETURNS BIGINT
+    LANGUAGE sql
+    AS $$
+    INSERT INTO case_counters (guild_id, last_id)
+    VALUES ($1, 1)
+    ON CONFLICT (guild_id) DO UPDATE
+    SET last_id = case_counters.last_id + 1
+    RETURNING last_id;
+$$;
@@ -0,0 +1,3 @@
+ALTER TABLE lastfm.config
+ADD COLUMN IF NOT EXISTS synced_at BIGINT,
+ADD COLUMN IF NOT EXISTS scrobbles BIGINT;
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS lastfm.jobs (
+    user_id BIGINT PRIMARY KEY,
+    username TEXT NOT NULL,
+    library TEXT,
+    page INTEGER NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 0,
+    items BIGINT NOT NULL DEFAULT 0,
+    synced_at BIGINT,
+    scrobbles BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS lastfm.listeners (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS listeners_user_id_idx
+ON lastfm.listeners (user_id);
+
+CREATE INDEX IF NOT EXISTS crowns_guild_id_user_id_idx
+ON lastfm.crowns (guild_id, user_id)
+INCLUDE (artist, plays);
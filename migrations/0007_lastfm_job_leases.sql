@@ -0,0 +1,6 @@
+ALTER TABLE lastfm.jobs
+ADD COLUMN IF NOT EXISTS owner TEXT,
+ADD COLUMN IF NOT EXISTS leased_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS jobs_owner_idx
+ON lastfm.jobs (owner, leased_at);
@@ -1,15 +1,18 @@
+from asyncio import sleep
 from os import environ
 import os
 import dotenv
 from pathlib import Path
+from random import uniform
 from traceback import format_exception
-from typing import TYPE_CHECKING, Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
 from aiohttp.client_exceptions import (
     ClientConnectorError,
     ClientResponseError,
     ContentTypeError,
 )
+from asyncpg import Connection
 from cashews import cache
 from discord import (
     AllowedMentions,
@@ -51,7 +54,10 @@ from tornado.ioloop import IOLoop
 
 import config
 from tools.managers import ClientSession, Context, HelpCommand, logging
-from tools.managers.database import connect
+from tools.managers.classifier import Classification, classify
+from tools.managers.database import command, connect, listen
+from tools.managers.monitor import LagMonitor
+from tools.managers.settings import SettingsCache
 from tools.utilities import Error, codeblock
 
 if TYPE_CHECKING:
@@ -88,7 +94,10 @@ class Kayo(Bot):
            m: os.environ[m] for m in ['host', 'port', 'user', 'database', 'password']
         }
         self.ioloop: IOLoop
-        self.blacklist: List[int] = []
+        self.blacklist: Set[int] = set()
+        self.listener: Optional[Connection] = None
+        self.settings: SettingsCache
+        self.monitor: LagMonitor
         self.session: ClientSession
         self.run(
             config.token,
@@ -100,24 +109,87 @@ class Kayo(Bot):
         return len(set(self.walk_commands()))
 
     async def get_prefix(self: "Kayo", message: Message) -> List[str]:
-        prefix = (
-            await self.db.fetchval(
+        settings = await self.settings.get(message.guild.id)
+
+        return when_mentioned_or(settings.prefix or config.prefix)(self, message)
+
+    async def prefixes_for(self: "Kayo", message: Message) -> Tuple[str, ...]:
+        prefix = config.prefix
+        if message.guild:
+            settings = await self.settings.get(message.guild.id)
+            prefix = settings.prefix or prefix
+
+        return (
+            prefix,
+            f"<@{self.user.id}> ",
+            f"<@!{self.user.id}> ",
+        )
+
+    async def classify(self: "Kayo", message: Message) -> Classification:
+        return classify(message, await self.prefixes_for(message))
+
+    async def load_blacklist(self: "Kayo") -> None:
+        if not self.listener or self.listener.is_closed():
+            self.listener = await listen(
+                "blacklist",
+                self.blacklist_notify,
+                **(
+                    {"dsn": config.Database.listener_dsn}
+                    if config.Database.listener_dsn
+                    else self.login_data
+                ),
+            )
+            self.listener.add_termination_listener(self.blacklist_terminate)
+
+        self.blacklist = {
+            record["user_id"]
+            for record in await self.db.fetch(
+                """
+                SELECT user_id
+                FROM blacklist
                 """
-                SELECT prefix
-                FROM settings
-                WHERE guild_id = $1
-                """,
-                message.guild.id,
             )
-            or config.prefix
-        )
+        }
 
-        return when_mentioned_or(prefix)(self, message)
+        log.info(f"Loaded {len(self.blacklist)} blacklisted users.")
+
+    def blacklist_notify(
+        self: "Kayo", connection: Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        action, user_id = payload.split(":", 1)
+        if action == "DELETE":
+            self.blacklist.discard(int(user_id))
+        else:
+            self.blacklist.add(int(user_id))
+
+    def blacklist_terminate(self: "Kayo", connection: Connection) -> None:
+        log.warning("Lost the blacklist listener, reconnecting.")
+        self.ioloop.add_callback(self.reconnect_blacklist)
+
+    async def reconnect_blacklist(self: "Kayo") -> None:
+        attempt = 0
+        while not self.is_closed():
+            try:
+                return await self.load_blacklist()
+            except Exception as exception:
+                delay = min(60, 2**attempt) + uniform(0, 1)
+                log.warning(
+                    f"Failed to reconnect the blacklist listener ({exception}), "
+                    f"retrying in {delay:.1f}s."
+                )
+
+                attempt += 1
+                await sleep(delay)
 
     async def setup_hook(self: "Kayo"):
         self.session = ClientSession()
         self.ioloop = IOLoop.current()
+        self.monitor = LagMonitor()
+        self.monitor.start()
         self.db = await connect(**self.login_data)
+        self.settings = SettingsCache(self.db)
+        await self.settings.warm()
+        await self.load_blacklist()
 
         for feature in Path("features").iterdir():
             if not feature.is_dir():
@@ -171,6 +243,20 @@ class Kayo(Bot):
 
         return await super().process_commands(message)
 
+    async def on_message(self: "Kayo", message: Message) -> None:
+        classification = await self.classify(message)
+        if not classification:
+            return
+
+        if classification.command:
+            await self.process_commands(message)
+
+        if classification.media:
+            self.dispatch("media_message", message, classification)
+
+        if classification.color:
+            self.dispatch("color_message", message, classification)
+
     async def on_message_edit(self: "Kayo", before: Message, after: Message) -> None:
         if before.content == after.content:
             return
@@ -180,6 +266,12 @@ class Kayo(Bot):
     async def get_context(self: "Kayo", message: Message, *, cls=Context) -> Context:
         return await super().get_context(message, cls=cls)
 
+    async def invoke(self: "Kayo", ctx: Context) -> None:
+        if ctx.command:
+            command.set(ctx.command.qualified_name)
+
+        return await super().invoke(ctx)
+
     async def on_command(self: "Kayo", ctx: Context) -> None:
         log.info(
             f"{ctx.author} ({ctx.author.id}) executed {ctx.command} in {ctx.guild} ({ctx.guild.id})."
@@ -1,7 +1,11 @@
 from .assets import *
+from .classifier import *
 from .context import *
 from .converters import *
 from .database import *
+from .lazy import *
+from .monitor import *
 from .network import *
 from .paginator import *
 from .parser import *
+from .settings import *
@@ -0,0 +1,65 @@
+from typing import List, Optional, Tuple
+
+from discord import Message
+
+triggers: Tuple[str, ...] = ("kayo", "slut")
+
+
+class Classification:
+    __slots__ = ("arguments", "prefix", "media", "color")
+
+    def __init__(
+        self: "Classification",
+        arguments: List[str],
+        prefix: Optional[str] = None,
+        media: bool = False,
+        color: bool = False,
+    ):
+        self.arguments: List[str] = arguments
+        self.prefix: Optional[str] = prefix
+        self.media: bool = media
+        self.color: bool = color
+
+    @property
+    def command(self: "Classification") -> bool:
+        return self.prefix is not None
+
+    def __bool__(self: "Classification") -> bool:
+        return self.command or self.media or self.color
+
+    def __repr__(self: "Classification") -> str:
+        return (
+            f"<Classification prefix={self.prefix!r} media={self.media} color={self.color}>"
+        )
+
+
+def classify(message: Message, prefixes: Tuple[str, ...]) -> Classification:
+    content = message.content
+    if not content or message.author.bot:
+        return Classification([])
+
+    arguments = content.split(maxsplit=2)
+    classification = Classification(arguments)
+
+    for prefix in prefixes:
+        if content.startswith(prefix):
+            classification.prefix = prefix
+            break
+
+    lowered = arguments[0].lower() if arguments else ""
+    if message.guild and (
+        lowered.startswith(triggers)
+        or content.lower().startswith(message.guild.me.display_name.lower())
+    ):
+        classification.media = True
+
+    if lowered == "##":
+        classification.color = any(
+            (attachment.content_type or "").startswith("image")
+            for attachment in message.attachments
+        )
+
+    elif lowered.startswith(("#", "0x", "rgb(")):
+        classification.color = True
+
+    return classification
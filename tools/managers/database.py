@@ -1,29 +1,302 @@
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from json import dumps, loads
-from typing import Any, Optional
+from pathlib import Path
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
 import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
 from config import Database
 from tools.managers import logging
 
 log = logging.getLogger(__name__)
+command: ContextVar[Optional[str]] = ContextVar("command", default=None)
+buckets = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+migrations = Path("migrations")
+
+queries: Dict[str, str] = {
+    "settings": """
+        SELECT *
+        FROM settings
+        WHERE guild_id = $1
+    """,
+    "lastfm.config": """
+        SELECT *
+        FROM lastfm.config
+        WHERE user_id = $1
+    """,
+    "lastfm.whoknows.artist": """
+        SELECT artists.user_id, artists.username, artists.plays
+        FROM lastfm.listeners
+        JOIN lastfm.artists
+        ON artists.user_id = listeners.user_id
+        WHERE listeners.guild_id = $2
+        AND artists.artist = $1
+        ORDER BY artists.plays DESC
+    """,
+    "lastfm.whoknows.album": """
+        SELECT albums.user_id, albums.username, albums.plays
+        FROM lastfm.listeners
+        JOIN lastfm.albums
+        ON albums.user_id = listeners.user_id
+        WHERE listeners.guild_id = $3
+        AND albums.album = $1
+        AND albums.artist = $2
+        ORDER BY albums.plays DESC
+    """,
+    "lastfm.whoknows.track": """
+        SELECT tracks.user_id, tracks.username, tracks.plays
+        FROM lastfm.listeners
+        JOIN lastfm.tracks
+        ON tracks.user_id = listeners.user_id
+        WHERE listeners.guild_id = $3
+        AND tracks.track = $1
+        AND tracks.artist = $2
+        ORDER BY tracks.plays DESC
+    """,
+    "lastfm.crowns": """
+        SELECT artist, plays
+        FROM lastfm.crowns
+        WHERE guild_id = $1
+        AND user_id = $2
+        ORDER BY plays DESC
+    """,
+}
+
 
 class Record(asyncpg.Record):
     def __getattr__(self, attr: str):
         return self.get(attr)
 
-async def setup(pool: asyncpg.Pool) -> asyncpg.Pool:
-    with open("schema.sql", "r", encoding="UTF-8") as buffer:
-        schema = buffer.read()
-        await pool.execute(schema)
+
+class Connection(asyncpg.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements: Dict[str, PreparedStatement] = {}
+
+    async def statement(self, name: str) -> PreparedStatement:
+        if name not in self.statements:
+            self.statements[name] = await self.prepare(queries[name])
+
+        return self.statements[name]
+
+
+class Statistics:
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.calls = 0
+        self.rows = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.histogram = [0] * (len(buckets) + 1)
+
+    def record(self, elapsed: float, rows: int = 0) -> None:
+        self.calls += 1
+        self.rows += rows
+        self.total += elapsed
+        self.maximum = max(self.maximum, elapsed)
+        self.histogram[bisect_left(buckets, elapsed * 1e3)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statement": " ".join(self.statement.split()),
+            "calls": self.calls,
+            "rows": self.rows,
+            "total": round(self.total * 1e3, 3),
+            "mean": round(self.total * 1e3 / (self.calls or 1), 3),
+            "maximum": round(self.maximum * 1e3, 3),
+            "histogram": dict(
+                zip([f"<={bucket}" for bucket in buckets] + ["inf"], self.histogram)
+            ),
+        }
+
+
+def count(result: Any) -> int:
+    if isinstance(result, list):
+        return len(result)
+
+    elif isinstance(result, str):
+        tag = result.rsplit(" ", 1)[-1]
+        return int(tag) if tag.isdigit() else 0
+
+    return int(result is not None)
+
+
+class Pool:
+    def __init__(self, pool: asyncpg.Pool, pgbouncer: bool = False):
+        self.pool = pool
+        self.pgbouncer = pgbouncer
+        self.statistics: Dict[str, Statistics] = {}
+        self.waiting = Statistics("acquire")
+        self.peak = 0
+
+    def __getattr__(self, attr: str):
+        return getattr(self.pool, attr)
+
+    @asynccontextmanager
+    async def acquire(self, **kwargs) -> AsyncIterator[Connection]:
+        start = perf_counter()
+        async with self.pool.acquire(**kwargs) as connection:
+            self.waiting.record(perf_counter() - start)
+            self.peak = max(
+                self.peak,
+                self.pool.get_size() - self.pool.get_idle_size(),
+            )
+
+            yield connection
+
+    def record(self, statement: str, elapsed: float, result: Any) -> None:
+        if not (statistics := self.statistics.get(statement)):
+            statistics = self.statistics[statement] = Statistics(statement)
+
+        statistics.record(elapsed, count(result))
+        if elapsed >= Database.slow_query:
+            log.warning(
+                f"Slow query took {elapsed * 1e3:.2f}ms"
+                + (f" in {name}" if (name := command.get()) else "")
+                + f": {' '.join(statement.split())[:256]}"
+            )
+
+    async def run(self, method: str, query: str, *args: Any, **kwargs: Any) -> Any:
+        async with self.acquire() as connection:
+            start = perf_counter()
+            result = await getattr(connection, method)(query, *args, **kwargs)
+
+        self.record(query, perf_counter() - start, result)
+        return result
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> str:
+        return await self.run("execute", query, *args, **kwargs)
+
+    async def executemany(self, query: str, *args: Any, **kwargs: Any) -> None:
+        return await self.run("executemany", query, *args, **kwargs)
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> List[Record]:
+        return await self.run("fetch", query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any) -> Optional[Record]:
+        return await self.run("fetchrow", query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return await self.run("fetchval", query, *args, **kwargs)
+
+    async def named(self, method: str, name: str, *args: Any) -> Any:
+        if self.pgbouncer:
+            return await self.run(method, queries[name], *args)
+
+        async with self.acquire() as connection:
+            statement = await connection.statement(name)
+
+            start = perf_counter()
+            result = await getattr(statement, method)(*args)
+
+        self.record(queries[name], perf_counter() - start, result)
+        return result
+
+    async def fetch_named(self, name: str, *args: Any) -> List[Record]:
+        return await self.named("fetch", name, *args)
+
+    async def fetchrow_named(self, name: str, *args: Any) -> Optional[Record]:
+        return await self.named("fetchrow", name, *args)
+
+    async def fetchval_named(self, name: str, *args: Any) -> Any:
+        return await self.named("fetchval", name, *args)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "pool": {
+                "size": self.pool.get_size(),
+                "idle": self.pool.get_idle_size(),
+                "minimum": self.pool.get_min_size(),
+                "maximum": self.pool.get_max_size(),
+                "peak": self.peak,
+            },
+            "acquire": self.waiting.to_dict(),
+            "statements": sorted(
+                (statistics.to_dict() for statistics in self.statistics.values()),
+                key=lambda statistics: statistics["total"],
+                reverse=True,
+            ),
+        }
+
+
+async def migrate(pool: Pool) -> Pool:
+    async with pool.acquire() as connection:
+        try:
+            version: int = (
+                await connection.fetchval("SELECT MAX(version) FROM migrations") or 0
+            )
+        except asyncpg.UndefinedTableError:
+            version = 0
+
+        for path in sorted(migrations.glob("*.sql")):
+            number = int(path.stem.split("_", 1)[0])
+            if number <= version:
+                continue
+
+            async with connection.transaction():
+                await connection.execute("SELECT pg_advisory_xact_lock(1337)")
+                await connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS migrations (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+                    )
+                    """
+                )
+                if await connection.fetchval(
+                    "SELECT TRUE FROM migrations WHERE version = $1",
+                    number,
+                ):
+                    continue
+
+                with open(path, "r", encoding="UTF-8") as buffer:
+                    await connection.execute(buffer.read())
+
+                await connection.execute(
+                    "INSERT INTO migrations (version, name) VALUES ($1, $2)",
+                    number,
+                    path.stem,
+                )
+
+            log.info(f"Applied migration {path.stem}.")
 
     return pool
 
-async def connect(**kwargs):
-    kwargs['record_class'] = Record 
-    
+
+async def connect(**kwargs) -> Pool:
+    kwargs["record_class"] = Record
+    kwargs["connection_class"] = Connection
+    kwargs.setdefault("min_size", Database.min_size)
+    kwargs.setdefault("max_size", Database.max_size)
+    kwargs.setdefault("max_queries", Database.max_queries)
+    kwargs.setdefault(
+        "max_inactive_connection_lifetime",
+        Database.max_inactive_connection_lifetime,
+    )
+    kwargs.setdefault(
+        "statement_cache_size",
+        0 if Database.pgbouncer else Database.statement_cache_size,
+    )
+
     pool = await asyncpg.create_pool(**kwargs)
 
     if not pool:
         raise Exception("Could not establish a connection to postgresql")
-    
-    return await setup(pool)
+
+    log.info(
+        f"Created a pool of {Database.min_size}-{Database.max_size} connections"
+        + (" in pgbouncer mode." if Database.pgbouncer else ".")
+    )
+    return await migrate(Pool(pool, pgbouncer=Database.pgbouncer))
+
+
+async def listen(channel: str, callback: Callable, **kwargs) -> asyncpg.Connection:
+    connection = await asyncpg.connect(**kwargs)
+    await connection.add_listener(channel, callback)
+
+    return connection
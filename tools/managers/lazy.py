@@ -0,0 +1,94 @@
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+def wrap(value: Any) -> Any:
+    if type(value) is dict:
+        return LazyDict(value)
+
+    elif type(value) is list:
+        return LazyList(value)
+
+    return value
+
+
+class LazyDict(dict):
+    __slots__ = ()
+
+    def __getitem__(self: "LazyDict", key: Any) -> Any:
+        try:
+            value = dict.__getitem__(self, key)
+        except KeyError:
+            return None
+
+        wrapped = wrap(value)
+        if wrapped is not value:
+            dict.__setitem__(self, key, wrapped)
+
+        return wrapped
+
+    def __getattr__(self: "LazyDict", key: str) -> Any:
+        if key.startswith("__"):
+            raise AttributeError(key)
+
+        return self[key]
+
+    def __setattr__(self: "LazyDict", key: str, value: Any) -> None:
+        self[key] = value
+
+    def __delattr__(self: "LazyDict", key: str) -> None:
+        try:
+            del self[key]
+        except KeyError as exc:
+            raise AttributeError(key) from exc
+
+    def get(self: "LazyDict", key: Any, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def values(self: "LazyDict") -> List[Any]:
+        return [self[key] for key in self]
+
+    def items(self: "LazyDict") -> List[Tuple[Any, Any]]:
+        return [(key, self[key]) for key in self]
+
+    def copy(self: "LazyDict") -> "LazyDict":
+        return LazyDict(self)
+
+
+class LazyList(list):
+    __slots__ = ()
+
+    def __getitem__(self: "LazyList", index: Any) -> Any:
+        value = list.__getitem__(self, index)
+        if isinstance(index, slice):
+            return LazyList(value)
+
+        wrapped = wrap(value)
+        if wrapped is not value:
+            list.__setitem__(self, index, wrapped)
+
+        return wrapped
+
+    def __iter__(self: "LazyList") -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def copy(self: "LazyList") -> "LazyList":
+        return LazyList(self)
+
+
+def resolve(data: Any, slug: Optional[str]) -> Any:
+    for path in slug.split(".") if slug else ():
+        if isinstance(data, list):
+            if path.isnumeric():
+                try:
+                    data = data[int(path)]
+                except IndexError:
+                    pass
+
+        elif isinstance(data, dict):
+            data = data.get(path)
+
+        else:
+            data = getattr(data, path, data)
+
+    return wrap(data)
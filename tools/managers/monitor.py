@@ -0,0 +1,55 @@
+from asyncio import Task, create_task, sleep
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+from tools.managers import logging
+from tools.managers.database import Statistics, command
+from tools.managers.network import parsers
+
+log = logging.getLogger(__name__)
+
+
+class LagMonitor:
+    def __init__(
+        self: "LagMonitor",
+        interval: float = 0.25,
+        threshold: float = 0.1,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.statistics = Statistics("loop lag")
+        self.task: Optional[Task] = None
+
+    def start(self: "LagMonitor") -> None:
+        if not self.task or self.task.done():
+            self.task = create_task(self.run(), name="loop-lag")
+
+    def stop(self: "LagMonitor") -> None:
+        if self.task:
+            self.task.cancel()
+
+    async def run(self: "LagMonitor") -> None:
+        while True:
+            start = perf_counter()
+            await sleep(self.interval)
+
+            lag = max(0.0, perf_counter() - start - self.interval)
+            self.statistics.record(lag)
+            if lag >= self.threshold:
+                log.warning(
+                    f"Event loop lagged {lag * 1e3:.2f}ms"
+                    + (f" during {name}." if (name := command.get()) else ".")
+                )
+
+    def report(self: "LagMonitor") -> Dict[str, Any]:
+        statistics = self.statistics.to_dict()
+        del statistics["statement"], statistics["rows"]
+
+        return {
+            "interval": self.interval * 1e3,
+            "lag": statistics,
+            "parsers": {
+                "workers": parsers._max_workers,
+                "queued": parsers._work_queue.qsize(),
+            },
+        }
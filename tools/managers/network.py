@@ -1,11 +1,48 @@
-from typing import Any, Dict, Optional
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from tempfile import TemporaryFile
+from typing import Any, BinaryIO, Callable, Dict, Optional, TypeVar
 
 from aiohttp import ClientSession as DefaultClientSession
 from aiohttp import ClientTimeout
 from bs4 import BeautifulSoup
-from munch import DefaultMunch
 from yarl import URL
 
+from tools.managers.lazy import resolve
+
+try:
+    from orjson import loads
+except ImportError:
+    try:
+        from msgspec.json import decode as loads
+    except ImportError:
+        from json import loads
+
+try:
+    import lxml  # noqa: F401
+
+    parser = "lxml"
+except ImportError:
+    parser = "html.parser"
+
+T = TypeVar("T")
+parsers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="parser")
+
+
+async def offload(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await get_running_loop().run_in_executor(
+        parsers, partial(func, *args, **kwargs)
+    )
+
+
+class FileTooLarge(Exception):
+    def __init__(self, size: int, limit: int):
+        self.size = size
+        self.limit = limit
+        super().__init__(f"The response exceeds the limit of {limit} bytes")
+
 
 class ClientSession(DefaultClientSession):
     def __init__(self, *args, **kwargs):
@@ -36,29 +73,54 @@ class ClientSession(DefaultClientSession):
             return await response.read()
 
         elif response.content_type == "text/html":
-            return BeautifulSoup(await response.text(), "html.parser")
+            return await offload(BeautifulSoup, await response.text(), parser)
 
         elif response.content_type in (
             "application/json",
             "application/octet-stream",
             "text/javascript",
         ):
+            body = await response.read()
             try:
-                data: Dict = await response.json(content_type=None)
+                data: Dict = loads(body) if body.strip() else None
             except Exception:
                 return response
 
-            munch = DefaultMunch.fromDict(data)
-            if slug:
-                for path in slug.split("."):
-                    if path.isnumeric() and isinstance(munch, list):
-                        try:
-                            munch = munch[int(path)]
-                        except IndexError:
-                            pass
+            return resolve(data, slug)
+
+        return response
 
-                    munch = getattr(munch, path, munch)
+    async def stream(
+        self,
+        url: str,
+        limit: int,
+        spool: int = 8 * 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+        **kwargs,
+    ) -> BinaryIO:
+        async with super().request("GET", URL(url), **kwargs) as response:
+            if response.content_length and response.content_length > limit:
+                raise FileTooLarge(response.content_length, limit)
 
-            return munch
+            buffer: BinaryIO = BytesIO()
+            size = 0
 
-        return response
+            try:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    size += len(chunk)
+                    if size > limit:
+                        raise FileTooLarge(size, limit)
+
+                    if size > spool and isinstance(buffer, BytesIO):
+                        file = TemporaryFile()
+                        file.write(buffer.getbuffer())
+                        buffer.close()
+                        buffer = file
+
+                    buffer.write(chunk)
+            except BaseException:
+                buffer.close()
+                raise
+
+        buffer.seek(0)
+        return buffer
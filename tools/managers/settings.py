@@ -0,0 +1,117 @@
+from asyncio import Task, create_task, shield
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple
+
+import asyncpg
+
+from tools.managers import logging
+from tools.managers.database import Pool
+
+log = logging.getLogger(__name__)
+
+
+class GuildSettings:
+    __slots__ = ("guild_id", "prefix", "mod_log_channel_id", "backup_task")
+
+    def __init__(
+        self: "GuildSettings",
+        guild_id: int,
+        prefix: Optional[str] = None,
+        mod_log_channel_id: Optional[int] = None,
+        backup_task: bool = False,
+    ):
+        self.guild_id: int = guild_id
+        self.prefix: Optional[str] = prefix
+        self.mod_log_channel_id: Optional[int] = mod_log_channel_id
+        self.backup_task: bool = backup_task
+
+    @classmethod
+    def from_record(cls, record: asyncpg.Record) -> "GuildSettings":
+        return cls(**{column: record[column] for column in cls.__slots__})
+
+    def __repr__(self: "GuildSettings") -> str:
+        return f"<GuildSettings guild_id={self.guild_id} prefix={self.prefix!r}>"
+
+
+class SettingsCache:
+    def __init__(self: "SettingsCache", pool: Pool, ttl: float = 300):
+        self.pool = pool
+        self.ttl = ttl
+        self.entries: Dict[int, Tuple[float, GuildSettings]] = {}
+        self.pending: Dict[int, Task] = {}
+
+    def __len__(self: "SettingsCache") -> int:
+        return len(self.entries)
+
+    def store(self: "SettingsCache", settings: GuildSettings) -> GuildSettings:
+        self.entries[settings.guild_id] = (monotonic() + self.ttl, settings)
+        return settings
+
+    def invalidate(self: "SettingsCache", guild_id: int) -> None:
+        self.entries.pop(guild_id, None)
+
+    async def warm(self: "SettingsCache") -> None:
+        for record in await self.pool.fetch(
+            """
+            SELECT *
+            FROM settings
+            """
+        ):
+            self.store(GuildSettings.from_record(record))
+
+        log.info(f"Cached the settings for {len(self)} guilds.")
+
+    async def fetch(self: "SettingsCache", guild_id: int) -> GuildSettings:
+        started = monotonic()
+        try:
+            record = await self.pool.fetchrow_named("settings", guild_id)
+        finally:
+            self.pending.pop(guild_id, None)
+
+        entry = self.entries.get(guild_id)
+        if entry and entry[0] - self.ttl > started:
+            # An update() landed while this read was in flight.
+            return entry[1]
+
+        return self.store(
+            GuildSettings.from_record(record) if record else GuildSettings(guild_id)
+        )
+
+    def refresh(self: "SettingsCache", guild_id: int) -> Task:
+        if not (task := self.pending.get(guild_id)):
+            task = self.pending[guild_id] = create_task(self.fetch(guild_id))
+
+        return task
+
+    async def get(self: "SettingsCache", guild_id: int) -> GuildSettings:
+        entry = self.entries.get(guild_id)
+        if entry:
+            if entry[0] <= monotonic():
+                # Serve the stale entry, writes already go through update().
+                self.refresh(guild_id)
+
+            return entry[1]
+
+        return await shield(self.refresh(guild_id))
+
+    async def update(
+        self: "SettingsCache", guild_id: int, **values: Any
+    ) -> GuildSettings:
+        columns = list(values)
+        for column in columns:
+            if column == "guild_id" or column not in GuildSettings.__slots__:
+                raise ValueError(f"Unknown settings column {column!r}")
+
+        record = await self.pool.fetchrow(
+            f"""
+            INSERT INTO settings (guild_id, {", ".join(columns)})
+            VALUES ($1, {", ".join(f"${index}" for index in range(2, len(columns) + 2))})
+            ON CONFLICT (guild_id) DO UPDATE
+            SET {", ".join(f"{column} = EXCLUDED.{column}" for column in columns)}
+            RETURNING *
+            """,
+            guild_id,
+            *values.values(),
+        )
+
+        return self.store(GuildSettings.from_record(record))
@@ -3,11 +3,10 @@ from typing import Dict, List, Optional
 
 from aiohttp import ClientResponseError
 from cashews import cache
-from munch import Munch
 from pydantic import BaseModel
 
 from config import Authorization
-from tools.managers import Asset, ClientSession, assets
+from tools.managers import Asset, ClientSession, LazyDict, assets
 
 cache.setup("mem://")
 
@@ -76,7 +75,7 @@ async def profile(
     username: str,
     with_posts: bool = False,
 ) -> InstagramProfile:
-    data: Munch = await session.request(
+    data: LazyDict = await session.request(
         f"https://www.instagram.com/{username}",
         params={
             "__a": "1",
@@ -134,7 +133,7 @@ async def fetch_stories(
     user_id: int,
     redistribute: bool = True,
 ) -> List[InstagramStoryItem]:
-    data: Munch = await session.request(
+    data: LazyDict = await session.request(
         "https://www.instagram.com/api/v1/feed/reels_media/",
         params={
             "reel_ids": user_id,
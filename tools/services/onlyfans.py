@@ -1,13 +1,15 @@
-from typing import List, Literal, Optional
+from asyncio import Semaphore, TimeoutError, create_task
+from re import search
+from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple
 
+from aiohttp import ClientError
 from bs4 import BeautifulSoup
 from pydantic import BaseModel
+from yarl import URL
 
-from tools.managers import ClientSession
+from tools.managers import ClientSession, offload
 from tools.utilities import sanitize
 
-# from jishaku.functools import executor_function
-
 
 class OnlyFansFile(BaseModel):
     url: str
@@ -25,39 +27,47 @@ class OnlyFansPost(BaseModel):
         return f"https://onlyfans.com/{self.user}/post/{self.id}"
 
     async def files(self: "OnlyFansPost", session: ClientSession) -> List[OnlyFansFile]:
-        files: List[OnlyFansFile] = []
         soup: BeautifulSoup = await session.request(
             f"https://coomer.party/onlyfans/user/{self.user}/post/{self.id}"
         )
 
-        for file in soup.findAll("div", class_="post__thumbnail"):
-            if not (image := file.find("img")):
-                continue
+        return await offload(attachments, soup)
+
+
+def attachments(soup: BeautifulSoup) -> List[OnlyFansFile]:
+    files: List[OnlyFansFile] = []
 
-            files.append(
-                OnlyFansFile(
-                    url=f"https:{image.attrs['src']}",
-                    mime="IMAGE",
-                )
+    for file in soup.findAll("div", class_="post__thumbnail"):
+        if not (image := file.find("img")):
+            continue
+
+        files.append(
+            OnlyFansFile(
+                url=f"https:{image.attrs['src']}",
+                mime="IMAGE",
             )
+        )
 
-        for file in soup.findAll("video", class_="post__video"):
-            if not (video := file.find("source")):
-                continue
+    for file in soup.findAll("video", class_="post__video"):
+        if not (video := file.find("source")):
+            continue
 
-            files.append(
-                OnlyFansFile(
-                    url=video.attrs["src"],
-                    mime="VIDEO",
-                )
+        files.append(
+            OnlyFansFile(
+                url=video.attrs["src"],
+                mime="VIDEO",
             )
+        )
 
-        return list(reversed(files))
+    return list(reversed(files))
 
 
 class OnlyFansUser(BaseModel):
     name: str
+    count: int = 0
     posts: List[OnlyFansPost] = []
+    pages: List[str] = []
+    cursor: Optional[str] = None
 
     @property
     def url(self: "OnlyFansUser") -> str:
@@ -93,6 +103,36 @@ def extract(soup: BeautifulSoup) -> List[OnlyFansPost]:
     return posts
 
 
+def total(soup: BeautifulSoup) -> Optional[int]:
+    if (small := soup.find("small")) and (
+        match := search(r"of (\d+)", small.text)  # type: ignore
+    ):
+        return int(match.group(1))
+
+
+def paginate(soup: BeautifulSoup) -> Tuple[List[str], Optional[str]]:
+    if not (menu := soup.find("menu")):
+        return [], None
+
+    following = menu.find("a", class_="next")  # type: ignore
+    offsets: Dict[int, str] = {}
+    for anchor in menu.findAll("a", href=True):  # type: ignore
+        url = URL(anchor.attrs["href"])
+        if (offset := url.query.get("o", "")).isdigit() and int(offset):
+            offsets[int(offset)] = url.path
+
+    if not offsets:
+        return [], following.attrs["href"] if following else None
+
+    step = min(offsets)
+    last = max(offsets)
+    if count := total(soup):
+        last = max(last, (count - 1) // step * step)
+
+    path = offsets[last]
+    return [f"{path}?o={offset}" for offset in range(step, last + 1, step)], None
+
+
 async def next_page(
     session: ClientSession, soup: BeautifulSoup
 ) -> Optional[BeautifulSoup]:
@@ -111,17 +151,46 @@ async def lookup(session: ClientSession, name: str) -> Optional[OnlyFansUser]:
     prop = soup.find("span", itemprop="name")
     user = OnlyFansUser(
         name=(prop.text if prop else "Unknown"),
-        posts=extract(soup),
+        posts=await offload(extract, soup),
     )
     if user.name == "Unknown":
         return
 
-    page: Optional[BeautifulSoup] = soup
-    while True:
-        page = await next_page(session, page)
-        if not page:
-            break
-
-        user.posts.extend(extract(page))
+    user.pages, user.cursor = await offload(paginate, soup)
+    user.count = total(soup) or len(user.posts) * (len(user.pages) + 1)
 
     return user
+
+
+async def pages(
+    session: ClientSession, user: OnlyFansUser, concurrency: int = 4
+) -> AsyncIterator[List[OnlyFansPost]]:
+    yield user.posts
+
+    if user.cursor:
+        page: Optional[BeautifulSoup] = await session.request(
+            f"https://coomer.party{user.cursor}"
+        )
+        while page:
+            yield await offload(extract, page)
+            page = await next_page(session, page)
+
+        return
+
+    semaphore = Semaphore(concurrency)
+
+    async def fetch(path: str) -> List[OnlyFansPost]:
+        async with semaphore:
+            soup: BeautifulSoup = await session.request(f"https://coomer.party{path}")
+            return await offload(extract, soup)
+
+    tasks = [create_task(fetch(path)) for path in user.pages]
+    try:
+        for task in tasks:
+            try:
+                yield await task
+            except (ClientError, TimeoutError):
+                continue
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,10 +1,9 @@
 from datetime import datetime
 from typing import List, Optional
 
-from munch import Munch
 from pydantic import BaseModel
 
-from tools.managers import ClientSession
+from tools.managers import ClientSession, LazyDict
 
 
 class TikTokUserStatistics(BaseModel):
@@ -59,7 +58,7 @@ class TikTokPost(BaseModel):
 
 
 async def post(session: ClientSession, aweme_id: str) -> Optional[TikTokPost]:
-    data: Munch = await session.request(
+    data: LazyDict = await session.request(
         "https://api16-normal-c-useast1a.tiktokv.com/aweme/v1/feed/",
         params={
             "aweme_id": aweme_id,
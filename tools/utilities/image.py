@@ -1,69 +1,181 @@
 from asyncio import gather
 from io import BytesIO
 from math import sqrt
-from typing import List
+from os import close, makedirs, path, remove, replace, scandir, utime
+from tempfile import mkstemp
+from time import time
+from typing import List, Optional, Tuple
 
 from discord import File
 from jishaku.functools import executor_function
 from PIL import Image
+from xxhash import xxh64_hexdigest
 
+from tools.managers.assets import cache
 from tools.managers.network import ClientSession
 
+covers = path.join(cache, "covers")
+makedirs(covers, exist_ok=True)
 
-@executor_function
-def __colage_open(buffer: BytesIO) -> Image.Image:
-    return Image.open(buffer).convert("RGBA").resize((256, 256))
+__Tile = Tuple[Optional[str], Optional[bytes]]
 
 
-@executor_function
-def __colage_paste(background: Image.Image, image: BytesIO, x: int, y: int) -> None:
-    background.paste(
-        image,
-        (
-            x * 256,
-            y * 256,
-        ),
+def __thumbnail(url: str, size: int = 256) -> str:
+    return path.join(covers, f"{xxh64_hexdigest(url)}_{size}.jpg")
+
+
+async def __download(session: ClientSession, url: str) -> Optional[bytes]:
+    if not url:
+        return None
+
+    try:
+        buffer = await session.request(url)
+    except Exception:
+        return None
+
+    return buffer if isinstance(buffer, bytes) else None
+
+
+async def __fetch(
+    session: ClientSession, url: str, size: int = 256
+) -> Optional[__Tile]:
+    if not url:
+        return None
+
+    file = __thumbnail(url, size)
+    if path.exists(file):
+        return file, None
+
+    if not (buffer := await __download(session, url)):
+        return None
+
+    return file, buffer
+
+
+def __store(image: Image.Image, file: str) -> None:
+    descriptor, temporary = mkstemp(dir=covers, suffix=".tmp")
+    close(descriptor)
+
+    try:
+        image.save(temporary, format="jpeg", quality=90)
+        replace(temporary, file)
+    except Exception:
+        remove(temporary)
+        raise
+
+
+def __prune(limit: int = 5000, age: int = 30 * 24 * 60 * 60) -> None:
+    entries = sorted(
+        (entry for entry in scandir(covers) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
     )
 
+    expiry = time() - age
+    for index, entry in enumerate(entries):
+        if index >= limit or entry.stat().st_mtime < expiry:
+            try:
+                remove(entry.path)
+            except OSError:
+                pass
 
-async def collage(session: ClientSession, image_urls: List[str]) -> File:
-    images: List[Image.Image] = await gather(
-        *[
-            __colage_open(BytesIO(buffer))
-            for buffer in await gather(
-                *[session.request(image_url) for image_url in image_urls]
+
+@executor_function
+def __compose(
+    tiles: List[Optional[__Tile]],
+    columns: int,
+    rows: int,
+    size: int = 256,
+    mode: str = "RGB",
+    format: str = "webp",
+) -> BytesIO:
+    background = Image.new(mode, (columns * size, rows * size))
+    stored = False
+
+    for index, tile in enumerate(tiles[: columns * rows]):
+        if not tile:
+            continue
+
+        file, buffer = tile
+        try:
+            if buffer is None:
+                image = Image.open(file)
+                utime(file)
+            else:
+                image = Image.open(BytesIO(buffer))
+                if mode == "RGB":
+                    image.draft("RGB", (size, size))
+
+                image = image.convert(mode).resize((size, size), Image.BILINEAR)
+                if file:
+                    __store(image, file)
+                    stored = True
+        except Exception:
+            continue
+
+        with image:
+            background.paste(
+                image,
+                (
+                    index % columns * size,
+                    index // columns * size,
+                ),
             )
-            if isinstance(buffer, bytes)
-        ]
-    )
 
-    rows = int(sqrt(len(images)))
-    columns = (len(images) + rows - 1) // rows
+    output = BytesIO()
+    if format == "webp":
+        background.save(output, format="webp", quality=85, method=0)
+    else:
+        background.save(output, format="png", compress_level=1)
 
-    background = Image.new(
-        "RGBA",
-        (
-            columns * 256,
-            rows * 256,
-        ),
-    )
-    await gather(
-        *[
-            __colage_paste(background, image, index % columns, index // columns)
-            for index, image in enumerate(images)
-        ]
+    output.seek(0)
+    background.close()
+
+    if stored:
+        __prune()
+
+    return output
+
+
+async def chart(
+    session: ClientSession,
+    image_urls: List[str],
+    columns: int,
+    rows: int,
+    size: int = 256,
+) -> File:
+    tiles = await gather(*[__fetch(session, url, size) for url in image_urls])
+    output = await __compose(
+        tiles,
+        columns,
+        rows,
+        size,
+        format="webp",
     )
 
-    output = BytesIO()
-    background.save(
+    return File(
         output,
-        format="png",
+        filename="chart.webp",
     )
 
-    output.seek(0)
-    background.close()
-    for image in images:
-        image.close()
+
+async def collage(session: ClientSession, image_urls: List[str]) -> File:
+    tiles: List[Optional[__Tile]] = [
+        (None, buffer)
+        for buffer in await gather(*[__download(session, url) for url in image_urls])
+        if buffer
+    ]
+
+    rows = int(sqrt(len(tiles))) or 1
+    columns = (len(tiles) + rows - 1) // rows
+
+    output = await __compose(
+        tiles,
+        columns or 1,
+        rows,
+        mode="RGBA",
+        format="png",
+    )
 
     return File(
         output,